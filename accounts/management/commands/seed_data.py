@@ -3,14 +3,16 @@ Management command to seed the database with sample data for testing.
 Usage: python manage.py seed_data
 """
 import random
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from products.models import Product
 from transactions.models import Transaction
+from transactions.rollups import rebuild_rollups
 from inventory.models import InventoryLog
 
 User = get_user_model()
@@ -92,6 +94,8 @@ class Command(BaseCommand):
                 receipt_counter += 1
                 receipt = f'SEED-{receipt_counter:05d}'
 
+                rand_hour = random.randint(8, 20)
+                rand_min = random.randint(0, 59)
                 Transaction.objects.create(
                     product=product,
                     quantity=qty,
@@ -99,28 +103,19 @@ class Command(BaseCommand):
                     total_price=product.price * qty,
                     cashier=cashier,
                     receipt_number=receipt,
-                    # We'll set the timestamp via raw update below
+                    # Back-dated; save() derives sale_date from it
+                    timestamp=timezone.make_aware(
+                        datetime.combine(sale_date, time(rand_hour, rand_min))
+                    ),
                 )
 
-                # Update timestamp to the past date
-                from django.utils import timezone
-                import datetime
-                txn = Transaction.objects.filter(receipt_number=receipt).first()
-                if txn:
-                    rand_hour = random.randint(8, 20)
-                    rand_min = random.randint(0, 59)
-                    Transaction.objects.filter(id=txn.id).update(
-                        timestamp=timezone.make_aware(
-                            datetime.datetime.combine(
-                                sale_date,
-                                datetime.time(rand_hour, rand_min),
-                            )
-                        )
-                    )
-
         total_txns = Transaction.objects.count()
         self.stdout.write(self.style.SUCCESS(f'  → {total_txns} transactions created'))
 
+        # Sample sales bypass checkout, so derive the rollups from them
+        daily_rows, _ = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'  → {daily_rows} daily sales rollups built'))
+
         # ── Summary ──
         self.stdout.write(self.style.SUCCESS('\n✅ Database seeded successfully!'))
         self.stdout.write(f'   Admin login:   admin / admin123')
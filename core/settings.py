@@ -31,10 +31,43 @@ AI_SCALER_PATH = os.environ.get(
     'AI_SCALER_PATH',
     os.path.join(BASE_DIR, 'ml_models', 'data_scaler.gz')
 )
+AI_MODEL_REGISTRY_DIR = os.environ.get(
+    'AI_MODEL_REGISTRY_DIR',
+    os.path.join(BASE_DIR, 'ml_models')
+)
+AI_MODEL_VERSION = os.environ.get('AI_MODEL_VERSION', 'default')  # active when ml_models/ACTIVE is absent
+AI_MODEL_CACHE_SIZE = int(os.environ.get('AI_MODEL_CACHE_SIZE', 2))  # loaded versions kept per worker
+AI_PRELOAD_MODEL = os.environ.get('AI_PRELOAD_MODEL', 'True').lower() in ('true', '1', 'yes')  # load in gunicorn master
 LSTM_INPUT_SIZE = 5       # sales, price, promo, weekday, month
 LSTM_HIDDEN_SIZE = 64
 LSTM_NUM_LAYERS = 2
 LSTM_SEQUENCE_LENGTH = 30  # 30-day look-back window
+LSTM_INFERENCE_BACKEND = os.environ.get('LSTM_INFERENCE_BACKEND', 'eager')  # eager | traced | quantized
+LSTM_NUM_THREADS = int(os.environ.get('LSTM_NUM_THREADS', 0))  # torch intra-op threads per process (0 = torch default)
+LSTM_PARITY_TOLERANCE = float(os.environ.get('LSTM_PARITY_TOLERANCE', 0.01))  # max scaled diff vs eager
+LSTM_SCALER_PARITY_TOLERANCE = float(os.environ.get('LSTM_SCALER_PARITY_TOLERANCE', 1e-4))  # compiled vs joblib scaler
+LSTM_INFERENCE_BATCH_SIZE = int(os.environ.get('LSTM_INFERENCE_BATCH_SIZE', 1024))  # windows per forward pass
+LSTM_INCREMENTAL_INFERENCE = os.environ.get('LSTM_INCREMENTAL_INFERENCE', 'False').lower() in ('true', '1', 'yes')  # reuse prefix states
+LSTM_STATE_CACHE_SIZE = int(os.environ.get('LSTM_STATE_CACHE_SIZE', 10000))  # cached (h, c) states per worker (~1 KB each)
+FORECAST_CACHE_SIZE = int(os.environ.get('FORECAST_CACHE_SIZE', 4096))  # cached forecasts per worker
+FORECAST_MC_SAMPLES = int(os.environ.get('FORECAST_MC_SAMPLES', 30))  # MC dropout samples per product
+FORECAST_MC_MAX_ROWS = int(os.environ.get('FORECAST_MC_MAX_ROWS', 16384))  # latency budget: products × samples per pass
+FORECAST_INTERVAL = float(os.environ.get('FORECAST_INTERVAL', 0.9))  # central interval for lower/upper bounds
+FORECAST_FALLBACK_ENABLED = os.environ.get('FORECAST_FALLBACK_ENABLED', 'True').lower() in ('true', '1', 'yes')  # baseline when LSTM fails
+FORECAST_LATENCY_BUDGET_MS = float(os.environ.get('FORECAST_LATENCY_BUDGET_MS', 0))  # max dispatcher wait before fallback (0 = off)
+SCENARIO_MAX_VARIANTS = int(os.environ.get('SCENARIO_MAX_VARIANTS', 20000))  # products × prices × calendars per call
+FORECAST_DISPATCH_ENABLED = os.environ.get('FORECAST_DISPATCH_ENABLED', 'False').lower() in ('true', '1', 'yes')
+FORECAST_DISPATCH_MAX_BATCH = int(os.environ.get('FORECAST_DISPATCH_MAX_BATCH', 64))  # windows per coalesced pass
+FORECAST_DISPATCH_MAX_WAIT_MS = float(os.environ.get('FORECAST_DISPATCH_MAX_WAIT_MS', 5))  # max time a request waits
+FORECAST_METRICS_WINDOW = int(os.environ.get('FORECAST_METRICS_WINDOW', 2048))  # latency samples kept per stage
+FORECAST_REFRESH_WORKERS = int(os.environ.get('FORECAST_REFRESH_WORKERS', 1))  # refresh_forecasts process pool
+FORECAST_REFRESH_MAX_AGE_DAYS = int(os.environ.get('FORECAST_REFRESH_MAX_AGE_DAYS', 7))  # re-forecast unchanged products this often
+FORECAST_JOB_WORKERS = int(os.environ.get('FORECAST_JOB_WORKERS', 1))  # background forecast threads per web worker
+FORECAST_JOB_CHUNK_SIZE = int(os.environ.get('FORECAST_JOB_CHUNK_SIZE', 256))  # products per job step (progress / cancel granularity)
+FORECAST_JOB_MAX_WAIT = float(os.environ.get('FORECAST_JOB_MAX_WAIT', 30))  # longest long-poll on a job status (seconds)
+RESTOCK_LEAD_TIME_DAYS = int(os.environ.get('RESTOCK_LEAD_TIME_DAYS', 3))  # supplier lead time when a product has none
+RESTOCK_SERVICE_LEVEL = float(os.environ.get('RESTOCK_SERVICE_LEVEL', 0.95))  # no-stockout probability when a product has none
+RESTOCK_REVIEW_DAYS = int(os.environ.get('RESTOCK_REVIEW_DAYS', 7))  # days of demand an order covers beyond the reorder point
 
 # ──────────────────────────────────────────────
 # Installed Apps
@@ -71,6 +104,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'predictions.middleware.ServerTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -103,6 +137,16 @@ DATABASES = {
     }
 }
 
+# ──────────────────────────────────────────────
+# Cache  (per-process memory — point at Redis/Memcached to share it across workers)
+# ──────────────────────────────────────────────
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+DASHBOARD_KPI_TIMEOUT = int(os.environ.get('DASHBOARD_KPI_TIMEOUT', 60))  # seconds before a KPI snapshot is recomputed
+
 # ──────────────────────────────────────────────
 # Auth
 # ──────────────────────────────────────────────
@@ -0,0 +1,102 @@
+"""
+Dashboard KPIs
+==============
+The DashboardSummaryView counters as one snapshot in Django's cache.
+
+A snapshot is computed with two aggregate queries — catalog counts (low
+stock via an F() comparison) and sales totals from the DailySales rollup —
+and then kept current by the writers: checkout and restock add their
+deltas once their transaction commits, product create/update/delete drop
+the snapshot so the next read recomputes it. Polling dashboards are served
+from the cache in between.
+
+Each snapshot carries its business day; the first read on a new day
+recomputes it, which resets the "today" counters. DASHBOARD_KPI_TIMEOUT
+bounds how long a snapshot lives, so writes that bypass these hooks
+(admin edits, imports, concurrent updates racing on a shared cache) are
+reflected within that many seconds.
+"""
+
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from products.models import Product
+from transactions.models import DailySales
+
+KPI_CACHE_KEY = 'dashboard:kpis'
+CENTS = Decimal('0.01')
+
+_lock = threading.Lock()
+
+
+def compute_kpis():
+    """Current KPI snapshot straight from the database."""
+    today = timezone.localdate()
+    catalog = Product.objects.filter(is_active=True).aggregate(
+        total_products=Count('id'),
+        low_stock_count=Count('id', filter=Q(quantity__lte=F('low_stock_threshold'))),
+    )
+    sales = DailySales.objects.aggregate(
+        total_transactions=Sum('transaction_count'),
+        total_revenue=Sum('revenue'),
+        today_transactions=Sum('transaction_count', filter=Q(date=today)),
+        today_revenue=Sum('revenue', filter=Q(date=today)),
+    )
+    return {
+        'date': today,
+        'expires_at': time.time() + settings.DASHBOARD_KPI_TIMEOUT,
+        'total_products': catalog['total_products'],
+        'low_stock_count': catalog['low_stock_count'],
+        'total_transactions': sales['total_transactions'] or 0,
+        'total_revenue': Decimal(sales['total_revenue'] or 0).quantize(CENTS),
+        'today_transactions': sales['today_transactions'] or 0,
+        'today_revenue': Decimal(sales['today_revenue'] or 0).quantize(CENTS),
+    }
+
+
+def get_kpis():
+    """The cached snapshot, recomputed when missing, expired or from another day."""
+    snapshot = cache.get(KPI_CACHE_KEY)
+    if snapshot is None or snapshot['date'] != timezone.localdate():
+        snapshot = compute_kpis()
+        cache.set(KPI_CACHE_KEY, snapshot, settings.DASHBOARD_KPI_TIMEOUT)
+    return snapshot
+
+
+def invalidate_kpis():
+    """Drop the snapshot; the next read recomputes it."""
+    cache.delete(KPI_CACHE_KEY)
+
+
+def apply_kpi_deltas(transactions=0, revenue=0, low_stock=0, sale_date=None):
+    """
+    Add a committed write's changes to the cached snapshot.
+
+    ``transactions`` and ``revenue`` count towards the totals and, when
+    ``sale_date`` is the snapshot's day, towards today's figures;
+    ``low_stock`` is the change in the number of low-stock products. Does
+    nothing without a snapshot — the next read computes a fresh one.
+    """
+    with _lock:
+        snapshot = cache.get(KPI_CACHE_KEY)
+        if snapshot is None:
+            return
+        # Deltas keep the snapshot's original expiry, so it is still rebuilt
+        # every DASHBOARD_KPI_TIMEOUT seconds under steady write traffic
+        remaining = snapshot['expires_at'] - time.time()
+        if remaining <= 0 or (sale_date is not None and sale_date != snapshot['date']):
+            cache.delete(KPI_CACHE_KEY)
+            return
+        snapshot['total_transactions'] += transactions
+        snapshot['total_revenue'] += revenue
+        snapshot['low_stock_count'] += low_stock
+        if sale_date is not None:
+            snapshot['today_transactions'] += transactions
+            snapshot['today_revenue'] += revenue
+        cache.set(KPI_CACHE_KEY, snapshot, remaining)
@@ -1,52 +1,41 @@
-from datetime import timedelta, date
+from datetime import datetime, time, timedelta
 
-from django.db.models import Sum, Count
-from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
+from django.db.models import F, Sum
+from django.db.models.functions import TruncHour, TruncWeek, TruncMonth
+from django.utils import timezone
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
 from products.models import Product
-from transactions.models import Transaction
+from transactions.models import DailySales, HourlySales
 from predictions.models import Prediction
+from .kpis import get_kpis
 
 
 class DashboardSummaryView(APIView):
     """
     GET /api/dashboard/summary/
-    Returns high-level KPIs.
+    Returns high-level KPIs (cached snapshot, see dashboard/kpis.py).
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        total_products = Product.objects.filter(is_active=True).count()
-        low_stock = sum(1 for p in Product.objects.filter(is_active=True) if p.is_low_stock)
-        total_transactions = Transaction.objects.count()
-        total_revenue = Transaction.objects.aggregate(
-            total=Sum('total_price')
-        )['total'] or 0
-
-        # Today's stats
-        today = date.today()
-        today_transactions = Transaction.objects.filter(timestamp__date=today).count()
-        today_revenue = Transaction.objects.filter(
-            timestamp__date=today
-        ).aggregate(total=Sum('total_price'))['total'] or 0
-
+        kpis = get_kpis()
         return Response({
-            'total_products': total_products,
-            'low_stock_count': low_stock,
-            'total_transactions': total_transactions,
-            'total_revenue': str(total_revenue),
-            'today_transactions': today_transactions,
-            'today_revenue': str(today_revenue),
+            'total_products': kpis['total_products'],
+            'low_stock_count': kpis['low_stock_count'],
+            'total_transactions': kpis['total_transactions'],
+            'total_revenue': str(kpis['total_revenue']),
+            'today_transactions': kpis['today_transactions'],
+            'today_revenue': str(kpis['today_revenue']),
         })
 
 
 class SalesTrendsView(APIView):
     """
-    GET /api/dashboard/sales-trends/?period=daily|weekly|monthly
+    GET /api/dashboard/sales-trends/?period=hourly|daily|weekly|monthly
     Returns aggregated sales data.
     """
 
@@ -55,23 +44,23 @@ class SalesTrendsView(APIView):
     def get(self, request):
         period = request.query_params.get('period', 'daily')
         days = int(request.query_params.get('days', 30))
-        start_date = date.today() - timedelta(days=days)
-
-        qs = Transaction.objects.filter(timestamp__date__gte=start_date)
-
-        trunc_fn = {
-            'daily': TruncDate,
-            'weekly': TruncWeek,
-            'monthly': TruncMonth,
-        }.get(period, TruncDate)
+        start_date = timezone.localdate() - timedelta(days=days)
+
+        if period == 'hourly':
+            # TruncHour only converts the stored hours to the local time zone
+            day_start = timezone.make_aware(datetime.combine(start_date, time.min))
+            qs = HourlySales.objects.filter(hour__gte=day_start).values(period=TruncHour('hour'))
+        else:
+            trunc_fn = {'weekly': TruncWeek, 'monthly': TruncMonth}.get(period)
+            qs = DailySales.objects.filter(date__gte=start_date).values(
+                period=trunc_fn('date') if trunc_fn else F('date'),
+            )
 
         trends = (
-            qs.annotate(period=trunc_fn('timestamp'))
-            .values('period')
-            .annotate(
-                total_revenue=Sum('total_price'),
+            qs.annotate(
+                total_revenue=Sum('revenue'),
                 total_quantity=Sum('quantity'),
-                transaction_count=Count('id'),
+                transaction_count=Sum('transaction_count'),
             )
             .order_by('period')
         )
@@ -100,11 +89,11 @@ class TopProductsView(APIView):
         limit = int(request.query_params.get('limit', 10))
 
         top = (
-            Transaction.objects
+            DailySales.objects
             .values('product__id', 'product__name')
             .annotate(
                 total_sold=Sum('quantity'),
-                total_revenue=Sum('total_price'),
+                total_revenue=Sum('revenue'),
             )
             .order_by('-total_sold')[:limit]
         )
@@ -130,22 +119,19 @@ class ForecastOverviewView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        products = Product.objects.filter(is_active=True)
+        products = Prediction.objects.with_latest(
+            Product.objects.filter(is_active=True), 'predicted_demand', 'prediction_date',
+        )
         data = []
 
         for product in products:
-            latest = (
-                Prediction.objects
-                .filter(product=product)
-                .order_by('-prediction_date')
-                .first()
-            )
+            latest_date = product.latest_prediction_date
             data.append({
                 'product_id': product.id,
                 'product_name': product.name,
                 'current_stock': product.quantity,
-                'predicted_demand': latest.predicted_demand if latest else None,
-                'prediction_date': str(latest.prediction_date) if latest else None,
+                'predicted_demand': product.latest_predicted_demand,
+                'prediction_date': str(latest_date) if latest_date else None,
             })
 
         return Response(data)
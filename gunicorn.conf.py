@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration.
+Usage: gunicorn core.wsgi:application -c gunicorn.conf.py
+
+The Django app is imported in the master process and, when
+AI_PRELOAD_MODEL is on, the LSTM model and scaler are loaded and warmed up
+there too. Forked workers then share the weights copy-on-write instead of
+each loading them on their first forecast request.
+"""
+
+preload_app = True
+
+
+def when_ready(server):
+    """Runs in the master after the app is imported, before workers fork."""
+    from django.conf import settings
+
+    if settings.AI_PRELOAD_MODEL:
+        from predictions.ml_utils import preload
+        preload()
+
+
+def post_fork(server, worker):
+    """Re-apply the per-process torch thread budget in each worker."""
+    from django.conf import settings
+
+    if settings.AI_PRELOAD_MODEL:
+        from predictions.ml_utils import apply_thread_budget
+        apply_thread_budget()
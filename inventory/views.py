@@ -2,10 +2,13 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 from accounts.permissions import IsAdmin
 from products.models import Product
+from predictions.cache import invalidate_products
+from dashboard.kpis import apply_kpi_deltas
 from .models import InventoryLog
 from .serializers import InventoryLogSerializer, RestockSerializer, StockLevelSerializer
 
@@ -61,6 +64,7 @@ class RestockView(APIView):
         product = get_object_or_404(Product, id=serializer.validated_data['product_id'])
         qty = serializer.validated_data['quantity']
 
+        was_low_stock = product.is_low_stock
         product.quantity += qty
         product.save()
 
@@ -72,6 +76,9 @@ class RestockView(APIView):
             performed_by=request.user,
             notes=serializer.validated_data.get('notes', ''),
         )
+        invalidate_products([product.id])
+        if product.is_active and was_low_stock and not product.is_low_stock:
+            transaction.on_commit(lambda: apply_kpi_deltas(low_stock=-1))
 
         return Response(
             {
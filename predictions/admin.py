@@ -1,9 +1,28 @@
 from django.contrib import admin
-from .models import Prediction
+from .models import Prediction, ForecastWatermark, ForecastJob
 
 
 @admin.register(Prediction)
 class PredictionAdmin(admin.ModelAdmin):
-    list_display = ('product', 'predicted_demand', 'prediction_date', 'created_at')
-    list_filter = ('prediction_date',)
+    list_display = (
+        'product', 'predicted_demand', 'lower_bound', 'upper_bound', 'confidence',
+        'prediction_date', 'model_version', 'engine', 'created_at',
+    )
+    list_filter = ('prediction_date', 'model_version', 'engine')
     search_fields = ('product__name',)
+
+
+@admin.register(ForecastWatermark)
+class ForecastWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('product', 'last_transaction_id', 'price', 'forecasted_at')
+    search_fields = ('product__name',)
+
+
+@admin.register(ForecastJob)
+class ForecastJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'status', 'products_done', 'products_total', 'requested_by',
+        'created_at', 'started_at', 'finished_at',
+    )
+    list_filter = ('status',)
+    readonly_fields = ('params', 'result', 'timings', 'worker')
@@ -0,0 +1,122 @@
+"""
+Baseline Forecasters
+====================
+Cheap statistical forecasts over the same (P, 30) daily-sales windows the
+LSTM sees. Used when a request asks for them, and automatically when the
+model can't be loaded or LSTM inference exceeds its latency budget.
+Pure NumPy, vectorized over products.
+
+Methods:
+  ewma            exponentially weighted level of daily sales
+  seasonal_naive  sales on the same weekday of the window's last week
+  croston         Croston's method for intermittent demand
+  auto            croston for intermittent series (ADI > 1.32), else ewma
+"""
+
+import numpy as np
+
+BASELINE_METHODS = ('ewma', 'seasonal_naive', 'croston')
+EWMA_ALPHA = 0.3
+CROSTON_ALPHA = 0.1
+SEASON_LENGTH = 7
+INTERMITTENT_ADI = 1.32  # Syntetos–Boylan cut-off on the average inter-demand interval
+
+
+def ewma(sales, alpha=EWMA_ALPHA):
+    """Final EWMA level of each row of a (P, T) sales matrix, as one dot product."""
+    num_days = sales.shape[1]
+    weights = alpha * (1 - alpha) ** np.arange(num_days - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (num_days - 1)  # level starts at the first observation
+    return sales @ weights
+
+
+def seasonal_naive(sales, window_ends, first_date, days, season=SEASON_LENGTH):
+    """
+    Repeat each window's last season: every forecast day takes the sales of
+    the latest window day on the same weekday.
+
+    Returns
+    -------
+    np.ndarray of shape (P, days)
+    """
+    targets = np.datetime64(first_date, 'D') + np.arange(days)
+    lags = (window_ends[:, np.newaxis] - targets).astype(np.int64) % season
+    return np.take_along_axis(sales, sales.shape[1] - 1 - lags, axis=1)
+
+
+def croston(sales, alpha=CROSTON_ALPHA):
+    """
+    Croston's estimate of the per-day demand rate: smoothed non-zero demand
+    size over smoothed interval between demands. Rows without sales give 0.
+    """
+    num_products, num_days = sales.shape
+    size = np.zeros(num_products)
+    interval = np.ones(num_products)
+    since_last = np.ones(num_products)
+    seen = np.zeros(num_products, dtype=bool)
+
+    for t in range(num_days):
+        demand = sales[:, t]
+        nonzero = demand > 0
+        first = nonzero & ~seen
+        size[first], interval[first] = demand[first], since_last[first]
+        update = nonzero & seen
+        size[update] += alpha * (demand[update] - size[update])
+        interval[update] += alpha * (since_last[update] - interval[update])
+        seen |= nonzero
+        since_last = np.where(nonzero, 1, since_last + 1)
+
+    return np.where(seen, size / interval, 0)
+
+
+def is_intermittent(sales):
+    """Rows whose average interval between sale days exceeds INTERMITTENT_ADI."""
+    sale_days = np.count_nonzero(sales, axis=1)
+    return sales.shape[1] > INTERMITTENT_ADI * np.maximum(sale_days, 1)
+
+
+def baseline_forecast(sales, window_ends, first_date, days, method='auto'):
+    """
+    Daily baseline forecast for many products.
+
+    Parameters
+    ----------
+    sales : np.ndarray of shape (P, 30)
+        Daily sold quantities per window, oldest day first.
+    window_ends : np.ndarray of shape (P,), dtype datetime64[D]
+        Date of the last day in each window.
+    first_date : datetime.date
+        First forecast day.
+    days : int
+        Number of days to forecast.
+    method : str
+        One of BASELINE_METHODS or 'auto'.
+
+    Returns
+    -------
+    (np.ndarray of shape (P, days) float, np.ndarray of shape (P,) str)
+        Forecast units per day and the method used for each product.
+    """
+    sales = np.asarray(sales, dtype=np.float64)
+    window_ends = np.asarray(window_ends, dtype='datetime64[D]')
+    num_products = len(sales)
+
+    if method == 'auto':
+        methods = np.where(is_intermittent(sales), 'croston', 'ewma')
+    elif method in BASELINE_METHODS:
+        methods = np.full(num_products, method)
+    else:
+        raise ValueError(
+            f"Unknown baseline method '{method}'. "
+            f"Expected one of: {', '.join(BASELINE_METHODS + ('auto',))}."
+        )
+
+    daily = np.zeros((num_products, days))
+    for name in np.unique(methods):
+        rows = methods == name
+        if name == 'seasonal_naive':
+            daily[rows] = seasonal_naive(sales[rows], window_ends[rows], first_date, days)
+        else:
+            level = ewma(sales[rows]) if name == 'ewma' else croston(sales[rows])
+            daily[rows] = level[:, np.newaxis]
+    return np.maximum(daily, 0), methods
@@ -0,0 +1,158 @@
+"""
+Forecast Result Cache
+=====================
+Process-local LRU memo for forecast results. Entries are keyed on the
+product, the fingerprint of its sales window (transaction count, units
+and last sale day from the DailySales rollup), its price and the
+identity of the loaded model/scaler, so a changed input never matches a
+stale entry. Writers that touch a product
+(checkout, restock) also drop its entries eagerly via ``invalidate``.
+
+Kept free of torch imports so write paths can invalidate cheaply.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class ForecastCache:
+    """Thread-safe bounded LRU with hit/miss counters."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._keys_by_product = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None. Keys start with the product id."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._keys_by_product.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_size:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+                self.evictions += 1
+
+    def invalidate(self, product_id):
+        """Drop every entry for ``product_id``."""
+        with self._lock:
+            for key in self._keys_by_product.pop(product_id, ()):
+                self._entries.pop(key, None)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_product.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _forget(self, key):
+        keys = self._keys_by_product.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_product[key[0]]
+
+
+class HiddenStateCache:
+    """
+    Thread-safe bounded LRU of LSTM states for incremental inference.
+
+    Holds one entry per (product, model identity): the (h, c) state after
+    the first 29 steps of the product's last window and a digest of those
+    29 input rows. A lookup only hits when the new window starts with the
+    same rows, so a window that slid forward (or a new model version)
+    always falls back to a full replay.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.drifts = 0
+        self.evictions = 0
+
+    def get(self, key, digest):
+        """Return the cached (h, c) for ``key`` if its prefix digest matches, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != digest:
+                self.drifts += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, digest, state):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (digest, state)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.drifts
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'drifts': self.drifts,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+
+forecast_cache = ForecastCache(settings.FORECAST_CACHE_SIZE)
+state_cache = HiddenStateCache(settings.LSTM_STATE_CACHE_SIZE)
+
+
+def invalidate_products(product_ids):
+    """Drop cached forecasts for every id in ``product_ids``."""
+    for product_id in product_ids:
+        forecast_cache.invalidate(product_id)
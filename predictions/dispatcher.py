@@ -0,0 +1,158 @@
+"""
+Inference Dispatcher
+====================
+Coalesces concurrent forecast requests inside one worker process into
+batched forward passes. Callers ``submit`` their (n, 30, 5) windows and
+block on a Future; a background thread collects requests for up to
+FORECAST_DISPATCH_MAX_WAIT_MS or until FORECAST_DISPATCH_MAX_BATCH windows
+are queued, runs them through ``predict_demand_batch`` as one tensor per
+model version, and hands each caller its slice of the result.
+
+Only useful when a worker serves requests concurrently (gunicorn
+``--threads`` / gthread workers); enable with FORECAST_DISPATCH_ENABLED.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    __slots__ = ('features', 'bundle', 'future', 'enqueued')
+
+    def __init__(self, features, bundle):
+        self.features = features
+        self.bundle = bundle
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class InferenceDispatcher:
+    """Background micro-batcher for ``predict_demand_batch``."""
+
+    def __init__(self, max_batch, max_wait_ms):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self._pending = deque()
+        self._pending_rows = 0
+        self._cond = threading.Condition()
+        self._pid = None
+
+        self.requests = 0
+        self.batches = 0
+        self.rows = 0
+        self.max_queue_depth = 0
+        self.last_batch_rows = 0
+        self._total_wait = 0.0
+
+    def submit(self, features, bundle):
+        """Queue ``features`` for ``bundle``; returns a Future of its (n,) predictions."""
+        request = _Request(features, bundle)
+        with self._cond:
+            self._ensure_worker()
+            self._pending.append(request)
+            self._pending_rows += len(features)
+            self.requests += 1
+            self.max_queue_depth = max(self.max_queue_depth, len(self._pending))
+            self._cond.notify()
+        return request.future
+
+    def predict(self, features, bundle, timeout=None):
+        """
+        Blocking ``submit``. Batches at least ``max_batch`` rows run directly.
+        Raises ``TimeoutError`` if a queued batch isn't done within ``timeout`` seconds.
+        """
+        if len(features) >= self.max_batch:
+            from .ml_utils import predict_demand_batch
+            return predict_demand_batch(features, bundle)
+        return self.submit(features, bundle).result(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queue_depth': len(self._pending),
+                'queued_rows': self._pending_rows,
+                'max_queue_depth': self.max_queue_depth,
+                'requests': self.requests,
+                'batches': self.batches,
+                'rows': self.rows,
+                'avg_batch_rows': round(self.rows / self.batches, 2) if self.batches else 0.0,
+                'last_batch_rows': self.last_batch_rows,
+                'avg_wait_ms': round(self._total_wait / self.requests * 1000, 3) if self.requests else 0.0,
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+    def _ensure_worker(self):
+        # Threads don't survive fork: start one per process on first use
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='inference-dispatcher', daemon=True).start()
+
+    def _next_batch(self):
+        """Block until a batch is due, then pop it from the queue."""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0].enqueued + self.max_wait
+            while self._pending_rows < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch, rows = [], 0
+            while self._pending and (not batch or rows + len(self._pending[0].features) <= self.max_batch):
+                request = self._pending.popleft()
+                rows += len(request.features)
+                batch.append(request)
+            self._pending_rows -= rows
+
+            now = time.monotonic()
+            self.batches += 1
+            self.rows += rows
+            self.last_batch_rows = rows
+            self._total_wait += sum(now - r.enqueued for r in batch)
+            return batch
+
+    def _run(self):
+        from .ml_utils import predict_demand_batch
+
+        while True:
+            batch = self._next_batch()
+
+            # One forward pass per model version in the batch
+            groups = {}
+            for request in batch:
+                groups.setdefault(id(request.bundle), []).append(request)
+
+            for requests in groups.values():
+                try:
+                    predicted = predict_demand_batch(
+                        np.concatenate([r.features for r in requests]), requests[0].bundle,
+                    )
+                except Exception as exc:
+                    logger.exception("Batched inference failed for %d requests", len(requests))
+                    for request in requests:
+                        request.future.set_exception(exc)
+                    continue
+
+                offset = 0
+                for request in requests:
+                    size = len(request.features)
+                    request.future.set_result(predicted[offset:offset + size])
+                    offset += size
+
+
+inference_dispatcher = InferenceDispatcher(
+    settings.FORECAST_DISPATCH_MAX_BATCH,
+    settings.FORECAST_DISPATCH_MAX_WAIT_MS,
+)
@@ -0,0 +1,255 @@
+"""
+Forecast Jobs
+=============
+Batch forecasts off the request path. ``job_runner.submit`` records a
+queued ForecastJob and hands it to a small per-process thread pool
+(FORECAST_JOB_WORKERS threads), so the POST returns at once and clients
+poll — or long-poll — the job. The runner forecasts the products in
+chunks of FORECAST_JOB_CHUNK_SIZE, persisting progress after each chunk
+and checking for cancellation between chunks; each job records its queue
+and run time plus the per-stage spans (see metrics.py) it spent.
+
+torch and the database driver release the GIL, so request threads keep
+being served while a job runs; keep FORECAST_JOB_WORKERS small so jobs
+can't take every core from checkout traffic.
+
+Jobs only live in their process's pool: one still queued or running when
+that process exits is marked failed the next time a pool starts on the
+same host.
+"""
+
+import os
+import math
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .metrics import collect_spans, span
+from .models import ForecastJob, Prediction
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+#  Batch forecast  (shared with BatchForecastView)
+# ─────────────────────────────────────────────
+
+def forecast_intervals(sampled):
+    """(confidence, lower_bound, upper_bound) per product of a ``forecast_uncertainty`` result."""
+    return [
+        (round(float(confidence), 4), round(float(lower), 2), round(float(upper), 2))
+        for confidence, lower, upper in zip(sampled['confidence'], sampled['lower'], sampled['upper'])
+    ]
+
+
+def uncertainty_summary(sampled, i):
+    """MC dropout statistics of product ``i`` for the response body."""
+    return {
+        'mean': round(float(sampled['mean'][i]), 2),
+        'std': round(float(sampled['std'][i]), 2),
+        'lower_bound': round(float(sampled['lower'][i]), 2),
+        'upper_bound': round(float(sampled['upper'][i]), 2),
+        'confidence': round(float(sampled['confidence'][i]), 4),
+        'interval': settings.FORECAST_INTERVAL,
+        'samples': sampled['samples'],
+    }
+
+
+def forecast_batch(products, days_ahead=7, model_version=None, mode='flat', engine='lstm',
+                   uncertainty=False, samples=None):
+    """
+    Forecast ``products`` as one batch and store their horizons.
+
+    Takes the fields of BatchForecastRequestSerializer. Raises what the
+    forecast raises (UnknownModelVersion, FileNotFoundError, TimeoutError, …).
+
+    Returns
+    -------
+    (list[dict], int, str) — per-product results, cached count, model version
+    """
+    from .ml_utils import forecast_uncertainty, forecast_with_engine, get_bundle
+
+    rollout_days = days_ahead if mode == 'rollout' else None
+    intervals = None
+    if uncertainty:
+        bundle = get_bundle(model_version)
+        sampled = forecast_uncertainty(products, bundle=bundle, samples=samples)
+        predicted, cached = sampled['predicted'], np.zeros(len(products), dtype=bool)
+        engines = ['lstm'] * len(products)
+        intervals = forecast_intervals(sampled)
+    else:
+        predicted, cached, engines, bundle = forecast_with_engine(
+            products, engine, model_version, rollout_days,
+        )
+    model_version = bundle.version if bundle else ''
+    daily = np.broadcast_to(predicted.reshape(len(products), -1), (len(products), days_ahead))
+
+    # ── Store predictions for each product and day ahead ──
+    with span('persist'):
+        Prediction.objects.store_horizon(
+            products, daily, days_ahead, model_version, intervals, engines,
+        )
+
+    results = []
+    for i, (product, values) in enumerate(zip(products, daily.tolist())):
+        result = {
+            'product_id': product.id,
+            'product_name': product.name,
+            'predicted_demand_per_day': math.ceil(sum(values) / days_ahead),
+            'total_predicted': sum(values),
+            'engine': str(engines[i]),
+        }
+        if mode == 'rollout':
+            result['daily'] = values
+        if uncertainty:
+            result['uncertainty'] = uncertainty_summary(sampled, i)
+        results.append(result)
+    return results, int(cached.sum()), model_version
+
+
+# ─────────────────────────────────────────────
+#  Background runner
+# ─────────────────────────────────────────────
+
+def _worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def fail_orphaned_jobs():
+    """Fail unfinished jobs whose worker process on this host has exited."""
+    host = socket.gethostname()
+    unfinished = ForecastJob.objects.filter(status__in=('queued', 'running'), worker__startswith=f'{host}:')
+    orphaned = [
+        job.pk for job in unfinished.only('pk', 'worker')
+        if not _pid_alive(int(job.worker.rsplit(':', 1)[1]))
+    ]
+    if orphaned:
+        ForecastJob.objects.filter(pk__in=orphaned, status__in=('queued', 'running')).update(
+            status='failed', error='Worker exited before the job finished.', finished_at=timezone.now(),
+        )
+        logger.warning("Marked %d orphaned forecast jobs as failed", len(orphaned))
+
+
+class JobRunner:
+    """Per-process thread pool running ForecastJobs."""
+
+    def __init__(self, max_workers, chunk_size):
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = max(1, chunk_size)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Threads don't survive fork: start one pool per process on first use
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='forecast-job')
+                fail_orphaned_jobs()
+            return self._executor
+
+    def submit(self, products, params, user=None):
+        """Record a queued job for ``products`` and start it once the row is committed."""
+        pool = self._pool()
+        job = ForecastJob.objects.create(
+            params=params,
+            requested_by=user,
+            worker=_worker_id(),
+            products_total=len(products),
+        )
+        product_ids = [p.id for p in products]
+        transaction.on_commit(lambda: pool.submit(self._run, job.pk, product_ids))
+        return job
+
+    def cancel(self, job):
+        """
+        Cancel ``job``: a queued job is cancelled at once, a running one
+        stops before its next chunk. Returns False if it already finished.
+        """
+        now = timezone.now()
+        if ForecastJob.objects.filter(pk=job.pk, status='queued').update(
+            status='cancelled', cancel_requested=True, finished_at=now,
+        ):
+            return True
+        return bool(ForecastJob.objects.filter(pk=job.pk, status='running').update(cancel_requested=True))
+
+    def _run(self, job_id, product_ids):
+        try:
+            # Claim the job, unless it was cancelled while queued
+            started = timezone.now()
+            if not ForecastJob.objects.filter(pk=job_id, status='queued').update(
+                status='running', started_at=started,
+            ):
+                return
+            job = ForecastJob.objects.get(pk=job_id)
+            run_started = time.perf_counter()
+            with collect_spans() as spans:
+                self._forecast(job, product_ids)
+            job.timings = {
+                'queue_ms': round((started - job.created_at).total_seconds() * 1000, 2),
+                'run_ms': round((time.perf_counter() - run_started) * 1000, 2),
+                'stages_ms': {stage: round(ms, 2) for stage, ms in spans.items()},
+            }
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'result', 'error', 'timings', 'finished_at'])
+        except Exception:
+            logger.exception("Forecast job %s crashed", job_id)
+            ForecastJob.objects.filter(pk=job_id).update(
+                status='failed', error='Job crashed; see the server log.', finished_at=timezone.now(),
+            )
+        finally:
+            close_old_connections()
+
+    def _forecast(self, job, product_ids):
+        """Forecast ``job``'s products chunk by chunk, leaving the outcome on ``job``."""
+        from products.models import Product
+
+        options = {k: v for k, v in job.params.items() if k not in ('product_ids', 'all_active')}
+        products = list(Product.objects.filter(id__in=product_ids).order_by('id'))
+        results, cached_count, model_version = [], 0, ''
+
+        for start in range(0, len(products), self.chunk_size):
+            if ForecastJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+                job.status = 'cancelled'
+                break
+            chunk = products[start:start + self.chunk_size]
+            try:
+                chunk_results, chunk_cached, model_version = forecast_batch(chunk, **options)
+            except Exception as exc:
+                logger.exception("Forecast job %s failed", job.pk)
+                job.status, job.error = 'failed', f'Prediction failed: {exc}'
+                break
+            results.extend(chunk_results)
+            cached_count += chunk_cached
+            job.products_done = start + len(chunk)
+            ForecastJob.objects.filter(pk=job.pk).update(products_done=job.products_done)
+        else:
+            job.status = 'succeeded'
+
+        job.result = {
+            'count': len(results),
+            'cached_count': cached_count,
+            'model_version': model_version,
+            'results': results,
+        }
+
+
+job_runner = JobRunner(settings.FORECAST_JOB_WORKERS, settings.FORECAST_JOB_CHUNK_SIZE)
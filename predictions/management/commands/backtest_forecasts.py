@@ -0,0 +1,178 @@
+"""
+Management command to measure forecast accuracy and inference throughput
+over the stored transaction history.
+Usage: python manage.py backtest_forecasts [--products 1 2] [--horizon 1] [--workers 4]
+                                           [--backend traced] [--model-version 2026-03-01] [--max-mae 2.5]
+
+Slides the 30-day window across each product's full history: every day
+with a complete look-back becomes one forecast, built exactly as the live
+forecast would have been built that day, and is scored against the mean
+daily sales of the following --horizon days. Windows are pushed through
+the model in batches, optionally across a process pool.
+
+Windows are scored on the model's unrounded demand (clipped at zero), not
+the whole units the live endpoints round up to, so a --horizon mean isn't
+penalised by up to a unit for rounding. MAPE only counts windows whose
+actual demand is non-zero. --max-mae makes the command fail when the
+overall MAE is above the threshold, for CI runs against a seeded database.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from products.models import Product
+from transactions.models import DailySales
+
+
+class Command(BaseCommand):
+    help = 'Backtest the demand model over historical sales windows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products', type=int, nargs='+',
+            help='Product ids to backtest (default: every active product).',
+        )
+        parser.add_argument(
+            '--horizon', type=int, default=1,
+            help='Days after each window scored against the forecast (default 1).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.LSTM_INFERENCE_BATCH_SIZE,
+            help='Windows per inference batch.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.FORECAST_REFRESH_WORKERS,
+            help='Inference processes (1 runs in-process).',
+        )
+        parser.add_argument(
+            '--backend', choices=['eager', 'traced', 'quantized'],
+            help='Inference backend to test (default: LSTM_INFERENCE_BACKEND).',
+        )
+        parser.add_argument(
+            '--model-version',
+            help='Model registry version to test (default: the active version).',
+        )
+        parser.add_argument(
+            '--max-mae', type=float,
+            help='Fail if the overall MAE exceeds this value.',
+        )
+
+    def handle(self, *args, **options):
+        horizon = options['horizon']
+        batch_size = options['batch_size']
+        workers = options['workers']
+        if not 1 <= horizon <= 30:
+            raise CommandError('--horizon must be between 1 and 30.')
+        if batch_size < 1 or workers < 1:
+            raise CommandError('--batch-size and --workers must be positive.')
+
+        self.stdout.write('Backtesting forecasts...\n')
+        started = time.perf_counter()
+
+        products = Product.objects.filter(is_active=True).order_by('id')
+        if options['products']:
+            products = products.filter(id__in=options['products'])
+        products = list(products)
+        if not products:
+            raise CommandError('No matching active products found.')
+
+        # ── One grouped query for the whole history ──
+        from predictions.ml_utils import (
+            apply_thread_budget, get_bundle, load_daily_sales,
+            predict_demand_batch, predict_version_batch, sliding_windows,
+        )
+        from predictions.registry import UnknownModelVersion
+
+        span = (
+            DailySales.objects
+            .filter(product__in=products)
+            .aggregate(first=Min('date'), last=Max('date'))
+        )
+        if span['first'] is None:
+            raise CommandError('No transactions to backtest against.')
+        start_date, end_date = span['first'], span['last']
+
+        sales = load_daily_sales([p.id for p in products], start_date, end_date)
+        features, targets, rows, _ = sliding_windows(
+            sales, start_date, [float(p.price) for p in products], horizon,
+        )
+        if not len(features):
+            raise CommandError(
+                f'History ({start_date} → {end_date}) is too short: need '
+                f'{settings.LSTM_SEQUENCE_LENGTH + 1 + horizon} days.'
+            )
+        self.stdout.write(
+            f'  → {len(features)} windows for {len(products)} products '
+            f'({start_date} → {end_date}, horizon {horizon}d)'
+        )
+
+        if options['backend']:
+            # Read when the bundle is loaded; this process only runs the backtest
+            settings.LSTM_INFERENCE_BACKEND = options['backend']
+        try:
+            # Load once in the parent so forked workers inherit the weights
+            bundle = get_bundle(options['model_version'])
+        except (FileNotFoundError, UnknownModelVersion) as exc:
+            raise CommandError(f'Could not load the model: {exc}')
+        self.stdout.write(f'  → Using model version {bundle.version} ({bundle.backend})')
+
+        # ── Batched inference ──
+        chunks = [features[i:i + batch_size] for i in range(0, len(features), batch_size)]
+        inference_started = time.perf_counter()
+        if workers == 1:
+            predicted = np.concatenate([
+                predict_demand_batch(chunk, bundle, rounded=False) for chunk in chunks
+            ])
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=apply_thread_budget,
+                initargs=(threads,),
+            ) as pool:
+                predicted = np.concatenate(list(
+                    pool.map(
+                        predict_version_batch, chunks,
+                        [bundle.version] * len(chunks), [False] * len(chunks),
+                    )
+                ))
+        inference_time = time.perf_counter() - inference_started
+
+        # ── Accuracy per product ──
+        errors = np.abs(predicted - targets)
+        nonzero = targets > 0
+        pct_errors = np.where(nonzero, errors / np.where(nonzero, targets, 1), 0)
+
+        self.stdout.write('\n  Scored on unrounded predictions')
+        self.stdout.write(f'  {"Product":<28}{"Windows":>9}{"MAE":>9}{"MAPE":>9}')
+        for row, product in enumerate(products):
+            mine = rows == row
+            self.stdout.write(
+                f'  {product.name[:27]:<28}{int(mine.sum()):>9}'
+                f'{errors[mine].mean():>9.2f}{self._mape(pct_errors, mine & nonzero):>9}'
+            )
+
+        overall_mae = float(errors.mean())
+        self.stdout.write(
+            f'  {"All products":<28}{len(errors):>9}'
+            f'{overall_mae:>9.2f}{self._mape(pct_errors, nonzero):>9}'
+        )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Backtested {len(features)} windows in {elapsed:.2f}s — '
+            f'{len(features) / inference_time:,.0f} windows/s inference '
+            f'({len(chunks)} batches, {workers} workers)'
+        ))
+
+        if options['max_mae'] is not None and overall_mae > options['max_mae']:
+            raise CommandError(f'MAE {overall_mae:.2f} is above --max-mae {options["max_mae"]}.')
+
+    @staticmethod
+    def _mape(pct_errors, mask):
+        return f'{pct_errors[mask].mean() * 100:.1f}%' if mask.any() else '—'
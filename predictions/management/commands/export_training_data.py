@@ -0,0 +1,185 @@
+"""
+Management command to export sliding sales windows as a training dataset.
+Usage: python manage.py export_training_data <output_dir> [--products 1 2] [--horizon 1]
+                                             [--chunk-products 64] [--block-days 180]
+
+Writes memory-mapped .npy files that training code can np.load(..., mmap_mode='r'):
+
+    features.npy   (N, 30, 5) float32  — unscaled, same layout as build_feature_matrix
+    targets.npy    (N,)       float32  — mean daily sales over the next --horizon days
+    index.npy      (N,)       [('product_id', int64), ('date', datetime64[D])]
+    metadata.json             — date range, horizon, products, feature names
+
+One window per product per day with a full look-back, product-major, built
+by the same ``sliding_windows`` / ``build_feature_batch`` code the live
+forecast uses, so training and serving features can't drift apart.
+
+Daily totals are streamed from the DailySales rollup with .iterator()
+into a per-chunk daily grid; windows are written in (--chunk-products ×
+--block-days) blocks, so memory stays bounded however long the history is.
+"""
+import json
+import os
+import time
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from products.models import Product
+from transactions.models import DailySales
+
+FEATURE_NAMES = ['sales', 'price', 'promo', 'weekday', 'month']
+ROWS_PER_FETCH = 50_000
+
+
+class Command(BaseCommand):
+    help = 'Export (N, 30, 5) sales windows and targets as memory-mapped .npy files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory to write the dataset to.')
+        parser.add_argument(
+            '--products', type=int, nargs='+',
+            help='Product ids to export (default: every active product).',
+        )
+        parser.add_argument(
+            '--horizon', type=int, default=1,
+            help='Days after each window averaged into its target (default 1).',
+        )
+        parser.add_argument(
+            '--chunk-products', type=int, default=64,
+            help='Products loaded and windowed together.',
+        )
+        parser.add_argument(
+            '--block-days', type=int, default=180,
+            help='Forecast days windowed together per product chunk.',
+        )
+
+    def handle(self, *args, **options):
+        horizon = options['horizon']
+        chunk_products = options['chunk_products']
+        block_days = options['block_days']
+        if not 1 <= horizon <= 30:
+            raise CommandError('--horizon must be between 1 and 30.')
+        if chunk_products < 1 or block_days < 1:
+            raise CommandError('--chunk-products and --block-days must be positive.')
+
+        from numpy.lib.format import open_memmap
+        from predictions.ml_utils import sliding_windows
+
+        self.stdout.write('Exporting training windows...\n')
+        started = time.perf_counter()
+        seq_len = settings.LSTM_SEQUENCE_LENGTH
+
+        products = Product.objects.filter(is_active=True).order_by('id')
+        if options['products']:
+            products = products.filter(id__in=options['products'])
+        products = list(products)
+        if not products:
+            raise CommandError('No matching active products found.')
+
+        history = (
+            DailySales.objects
+            .filter(product__in=products)
+            .aggregate(first=Min('date'), last=Max('date'))
+        )
+        if history['first'] is None:
+            raise CommandError('No transactions to export.')
+        start_date, end_date = history['first'], history['last']
+        num_days = (end_date - start_date).days + 1
+
+        # Every product gets one window per day with a full look-back and horizon
+        windows_per_product = num_days - seq_len - horizon
+        if windows_per_product < 1:
+            raise CommandError(
+                f'History ({start_date} → {end_date}) is too short: need '
+                f'{seq_len + 1 + horizon} days.'
+            )
+        total = len(products) * windows_per_product
+        self.stdout.write(
+            f'  → {total} windows for {len(products)} products ({start_date} → {end_date})'
+        )
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        path = lambda name: os.path.join(options['output_dir'], name)  # noqa: E731
+        features = open_memmap(path('features.npy'), mode='w+', dtype=np.float32,
+                               shape=(total, seq_len, len(FEATURE_NAMES)))
+        targets = open_memmap(path('targets.npy'), mode='w+', dtype=np.float32, shape=(total,))
+        index = open_memmap(path('index.npy'), mode='w+', shape=(total,),
+                            dtype=[('product_id', np.int64), ('date', 'datetime64[D]')])
+
+        # (P, T, ...) views of the product-major files, so blocks land in place
+        grid_shape = (len(products), windows_per_product)
+        features_by_product = features.reshape(grid_shape + features.shape[1:])
+        targets_by_product = targets.reshape(grid_shape)
+        index_by_product = index.reshape(grid_shape)
+
+        for p0 in range(0, len(products), chunk_products):
+            chunk = products[p0:p0 + chunk_products]
+            p1 = p0 + len(chunk)
+            grid = self._daily_grid([p.id for p in chunk], start_date, num_days)
+            prices = [float(p.price) for p in chunk]
+            index_by_product['product_id'][p0:p1] = np.array([p.id for p in chunk])[:, np.newaxis]
+
+            for t0 in range(0, windows_per_product, block_days):
+                t1 = min(t0 + block_days, windows_per_product)
+                # Grid columns t0 … t1 + seq_len + horizon yield exactly the windows t0 … t1
+                block, block_targets, _, dates = sliding_windows(
+                    grid[:, t0:t1 + seq_len + horizon], start_date + timedelta(days=t0),
+                    prices, horizon,
+                )
+                shape = (len(chunk), t1 - t0)
+                features_by_product[p0:p1, t0:t1] = block.reshape(shape + block.shape[1:])
+                targets_by_product[p0:p1, t0:t1] = block_targets.reshape(shape)
+                index_by_product['date'][p0:p1, t0:t1] = dates.reshape(shape)
+
+            self.stdout.write(f'  ✓ Products {p0 + 1}–{p1}')
+
+        for array in (features, targets, index):
+            array.flush()
+
+        with open(path('metadata.json'), 'w') as fh:
+            json.dump({
+                'created_at': timezone.now().isoformat(),
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'horizon': horizon,
+                'sequence_length': seq_len,
+                'features': FEATURE_NAMES,
+                'windows': total,
+                'windows_per_product': windows_per_product,
+                'products': [p.id for p in products],
+                'scaled': False,
+            }, fh, indent=2)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Exported {total} windows to {options["output_dir"]} in {elapsed:.2f}s'
+        ))
+
+    def _daily_grid(self, product_ids, start_date, num_days):
+        """Stream the products' daily sales rollups into a (P, num_days) grid."""
+        grid = np.zeros((len(product_ids), num_days), dtype=np.float32)
+        row_of = {pid: i for i, pid in enumerate(product_ids)}
+        origin = start_date.toordinal()
+
+        rows = (
+            DailySales.objects
+            .filter(product_id__in=product_ids)
+            .values_list('product_id', 'date', 'quantity')
+            .order_by()
+            .iterator(chunk_size=ROWS_PER_FETCH)
+        )
+        while True:
+            batch = list(islice(rows, ROWS_PER_FETCH))
+            if not batch:
+                return grid
+            batch_products, days, quantities = zip(*batch)
+            grid[
+                [row_of[pid] for pid in batch_products],
+                [day.toordinal() - origin for day in days],
+            ] = quantities
@@ -0,0 +1,152 @@
+"""
+Management command to re-forecast only the products whose sales changed.
+Usage: python manage.py refresh_forecasts [--all] [--days-ahead 7] [--batch-size 1024] [--workers 4]
+
+A product is "dirty" when it has transactions newer than the one recorded
+in its ForecastWatermark, its price changed, it was never forecast, or its
+last forecast is older than FORECAST_REFRESH_MAX_AGE_DAYS. Run nightly
+(e.g. from cron) so RecommendationView and ForecastOverviewView read fresh
+Prediction rows.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from products.models import Product
+from transactions.models import Transaction
+from predictions.models import Prediction, ForecastWatermark
+
+
+class Command(BaseCommand):
+    help = 'Re-forecast products with new transactions since their last forecast.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-forecast every active product, dirty or not.',
+        )
+        parser.add_argument(
+            '--days-ahead', type=int, default=7,
+            help='Number of future days to store (1–30, default 7).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.LSTM_INFERENCE_BATCH_SIZE,
+            help='Products per inference batch.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.FORECAST_REFRESH_WORKERS,
+            help='Inference processes (1 runs in-process).',
+        )
+
+    def handle(self, *args, **options):
+        days_ahead = options['days_ahead']
+        batch_size = options['batch_size']
+        workers = options['workers']
+        if not 1 <= days_ahead <= 30:
+            raise CommandError('--days-ahead must be between 1 and 30.')
+        if batch_size < 1 or workers < 1:
+            raise CommandError('--batch-size and --workers must be positive.')
+
+        self.stdout.write('Refreshing forecasts...\n')
+        started = time.perf_counter()
+
+        dirty = self._dirty_products(refresh_all=options['all'])
+        if not dirty:
+            self.stdout.write(self.style.SUCCESS('  • All forecasts are up to date'))
+            return
+        self.stdout.write(f'  → {len(dirty)} products to re-forecast')
+
+        from predictions.ml_utils import (
+            apply_thread_budget, get_bundle, load_feature_batch,
+            predict_demand_batch, predict_version_batch,
+        )
+        from predictions.registry import UnknownModelVersion
+        try:
+            # Load once in the parent so forked workers inherit the weights
+            bundle = get_bundle()
+        except (FileNotFoundError, UnknownModelVersion) as exc:
+            raise CommandError(f'Could not load the active model: {exc}')
+        self.stdout.write(f'  → Using model version {bundle.version} ({bundle.backend})')
+
+        batches = [dirty[i:i + batch_size] for i in range(0, len(dirty), batch_size)]
+
+        if workers == 1:
+            for batch in batches:
+                features, _ = load_feature_batch(batch)
+                self._store(batch, predict_demand_batch(features, bundle), days_ahead, bundle.version)
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=apply_thread_budget,
+                initargs=(threads,),
+            ) as pool:
+                # Keep loading the next batch while earlier ones run in the pool
+                pending = []
+                for batch in batches:
+                    features, _ = load_feature_batch(batch)
+                    pending.append(
+                        (batch, pool.submit(predict_version_batch, features, bundle.version))
+                    )
+                for batch, future in pending:
+                    self._store(batch, future.result(), days_ahead, bundle.version)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Re-forecast {len(dirty)} products in {elapsed:.2f}s '
+            f'({len(batches)} batches, {workers} workers)'
+        ))
+
+    def _dirty_products(self, refresh_all=False):
+        """Active products whose inputs changed since their last forecast."""
+        last_txn = (
+            Transaction.objects
+            .filter(product=OuterRef('pk'))
+            .order_by('-id')
+            .values('id')[:1]
+        )
+        products = (
+            Product.objects
+            .filter(is_active=True)
+            .annotate(last_txn_id=Coalesce(Subquery(last_txn), 0))
+            .order_by('id')
+        )
+        if not refresh_all:
+            stale_before = timezone.now() - timedelta(days=settings.FORECAST_REFRESH_MAX_AGE_DAYS)
+            products = products.filter(
+                Q(forecast_watermark__isnull=True)
+                | Q(last_txn_id__gt=F('forecast_watermark__last_transaction_id'))
+                | ~Q(price=F('forecast_watermark__price'))
+                | Q(forecast_watermark__forecasted_at__lt=stale_before)
+            )
+        return list(products)
+
+    def _store(self, products, predicted, days_ahead, model_version):
+        """Upsert the horizon and advance the watermarks in one transaction."""
+        now = timezone.now()
+        with db_transaction.atomic():
+            Prediction.objects.store_horizon(products, predicted, days_ahead, model_version)
+            ForecastWatermark.objects.bulk_create(
+                [
+                    ForecastWatermark(
+                        product=product,
+                        last_transaction_id=product.last_txn_id,
+                        price=product.price,
+                        forecasted_at=now,
+                    )
+                    for product in products
+                ],
+                update_conflicts=True,
+                unique_fields=['product'],
+                update_fields=['last_transaction_id', 'price', 'forecasted_at'],
+            )
+
+        self.stdout.write(f'  ✓ Stored {len(products)} forecasts')
@@ -0,0 +1,293 @@
+"""
+Management command to train DemandLSTM on an exported window dataset and
+write it to the model registry as a new version.
+Usage: python manage.py retrain_model <dataset_dir> [--model-version 2026-05-01]
+                                      [--warm-start [VERSION]] [--epochs 30] [--patience 5]
+                                      [--batch-size 512] [--workers 2] [--threads 4] [--activate]
+
+<dataset_dir> is the output of ``export_training_data``. The newest
+--val-fraction of forecast days is held out for validation and early
+stopping; the weights with the best validation loss are kept.
+
+A fresh run refits the MinMaxScaler on the training windows (in chunks,
+straight off the memory-mapped files). --warm-start fine-tunes the given
+version (default: the active one) and keeps its scaler, so the weights stay
+valid for the inputs they were trained on.
+
+Batches are gathered and scaled by --workers DataLoader processes while the
+main process trains with --threads torch threads. The bundle is written
+to a temporary directory and moved into place in one step, so a partial
+run never shows up as a version; --activate switches traffic to it (after
+the registry's usual load and parity check).
+"""
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+SCALER_FIT_CHUNK = 65_536  # windows per MinMaxScaler.partial_fit call
+
+
+class WindowBatches:
+    """
+    Map-style dataset that returns whole scaled batches.
+
+    Indexed with a list of window indices (from a BatchSampler), so each
+    worker does one fancy-index into the memory-mapped files and one
+    vectorised scaling per batch instead of per window.
+    """
+
+    def __init__(self, dataset_dir, scale, offset):
+        self.dataset_dir = dataset_dir
+        self.scale = scale.astype(np.float32)
+        self.offset = offset.astype(np.float32)
+        self._features = self._targets = None
+
+    def _open(self):
+        # Opened lazily so every worker maps the files itself
+        self._features = np.load(os.path.join(self.dataset_dir, 'features.npy'), mmap_mode='r')
+        self._targets = np.load(os.path.join(self.dataset_dir, 'targets.npy'), mmap_mode='r')
+
+    def __getitem__(self, indices):
+        import torch
+
+        if self._features is None:
+            self._open()
+        indices = np.sort(indices)  # sequential reads from the mapped files
+        features = self._features[indices] * self.scale + self.offset
+        targets = self._targets[indices] * self.scale[0] + self.offset[0]
+        return torch.from_numpy(features), torch.from_numpy(targets.astype(np.float32))
+
+
+def _single_thread_worker(worker_id):
+    import torch
+
+    torch.set_num_threads(1)  # workers only gather and scale; leave the cores to training
+
+
+class Command(BaseCommand):
+    help = 'Train DemandLSTM on an exported dataset and save it as a new model version.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset_dir', help='Output directory of export_training_data.')
+        parser.add_argument(
+            '--model-version',
+            help='Name of the new version (default: current date and time).',
+        )
+        parser.add_argument(
+            '--warm-start', nargs='?', const='', metavar='VERSION',
+            help='Fine-tune an existing version (default: the active one) instead of training from scratch.',
+        )
+        parser.add_argument('--epochs', type=int, default=30, help='Maximum training epochs.')
+        parser.add_argument(
+            '--patience', type=int, default=5,
+            help='Stop after this many epochs without a better validation loss.',
+        )
+        parser.add_argument('--batch-size', type=int, default=512, help='Windows per training batch.')
+        parser.add_argument('--learning-rate', type=float, default=1e-3, help='Adam learning rate.')
+        parser.add_argument(
+            '--val-fraction', type=float, default=0.1,
+            help='Newest fraction of forecast days held out for validation.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='DataLoader worker processes (0 loads batches in-process).',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.LSTM_NUM_THREADS or os.cpu_count() or 1,
+            help='torch threads used for training.',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for weights and shuffling.')
+        parser.add_argument(
+            '--activate', action='store_true',
+            help='Make the new version active once it is written.',
+        )
+
+    def handle(self, *args, **options):
+        import joblib
+        import torch
+        from sklearn.preprocessing import MinMaxScaler
+
+        from predictions.ml_utils import DemandLSTM
+        from predictions.registry import (
+            DEFAULT_VERSION, MODEL_FILENAME, SCALER_FILENAME, UnknownModelVersion, model_registry,
+        )
+
+        if options['epochs'] < 1 or options['batch_size'] < 1 or options['threads'] < 1:
+            raise CommandError('--epochs, --batch-size and --threads must be positive.')
+        if options['workers'] < 0 or options['patience'] < 1:
+            raise CommandError('--workers must be ≥ 0 and --patience positive.')
+        if not 0 < options['val_fraction'] < 1:
+            raise CommandError('--val-fraction must be between 0 and 1.')
+
+        dataset_dir = options['dataset_dir']
+        try:
+            with open(os.path.join(dataset_dir, 'metadata.json')) as fh:
+                metadata = json.load(fh)
+            features = np.load(os.path.join(dataset_dir, 'features.npy'), mmap_mode='r')
+            index = np.load(os.path.join(dataset_dir, 'index.npy'), mmap_mode='r')
+        except FileNotFoundError as exc:
+            raise CommandError(f'Not an export_training_data dataset: {exc}')
+        if features.shape[1:] != (settings.LSTM_SEQUENCE_LENGTH, settings.LSTM_INPUT_SIZE):
+            raise CommandError(f'Dataset windows have shape {features.shape[1:]}, expected '
+                               f'({settings.LSTM_SEQUENCE_LENGTH}, {settings.LSTM_INPUT_SIZE}).')
+
+        version = options['model_version'] or timezone.localtime().strftime('%Y-%m-%d-%H%M')
+        try:
+            model_path, scaler_path = model_registry.paths(version)
+        except UnknownModelVersion as exc:
+            raise CommandError(str(exc))
+        version_dir = os.path.dirname(model_path)
+        if version == DEFAULT_VERSION or os.path.exists(version_dir):
+            raise CommandError(f"Model version '{version}' already exists.")
+
+        self.stdout.write(f'Training model version {version}...\n')
+        started = time.perf_counter()
+        torch.manual_seed(options['seed'])
+        torch.set_num_threads(options['threads'])
+
+        # ── Time-based split: the newest forecast days validate ──
+        dates = np.asarray(index['date'])
+        days = np.unique(dates)
+        cutoff = days[-max(1, int(len(days) * options['val_fraction']))]
+        train_idx = np.flatnonzero(dates < cutoff)
+        val_idx = np.flatnonzero(dates >= cutoff)
+        if not len(train_idx):
+            raise CommandError('Dataset is too small to hold out a validation split.')
+        self.stdout.write(
+            f'  → {len(train_idx)} training / {len(val_idx)} validation windows '
+            f'(validating from {cutoff})'
+        )
+
+        # ── Model and scaler ──
+        model = DemandLSTM(
+            input_size=settings.LSTM_INPUT_SIZE,
+            hidden_size=settings.LSTM_HIDDEN_SIZE,
+            num_layers=settings.LSTM_NUM_LAYERS,
+        )
+        if options['warm_start'] is not None:
+            base = options['warm_start'] or model_registry.active_version()
+            base_model_path, base_scaler_path = model_registry.paths(base)
+            try:
+                model.load_state_dict(torch.load(base_model_path, map_location='cpu', weights_only=True))
+                scaler = joblib.load(base_scaler_path)
+            except FileNotFoundError as exc:
+                raise CommandError(f"Could not load version '{base}' to warm-start from: {exc}")
+            self.stdout.write(f'  → Warm-starting from version {base} (keeping its scaler)')
+        else:
+            scaler = MinMaxScaler()
+            for start in range(0, len(train_idx), SCALER_FIT_CHUNK):
+                chunk = features[train_idx[start:start + SCALER_FIT_CHUNK]]
+                scaler.partial_fit(chunk.reshape(-1, chunk.shape[-1]))
+            self.stdout.write('  ✓ Fitted scaler on the training windows')
+
+        # ── Data loading ──
+        dataset = WindowBatches(dataset_dir, scaler.scale_, scaler.min_)
+        generator = torch.Generator().manual_seed(options['seed'])
+        loader_options = {
+            'batch_size': None,  # the sampler already yields whole batches
+            'num_workers': options['workers'],
+            'worker_init_fn': _single_thread_worker,
+            'persistent_workers': options['workers'] > 0,
+        }
+        train_loader = torch.utils.data.DataLoader(
+            dataset,
+            sampler=torch.utils.data.BatchSampler(
+                torch.utils.data.SubsetRandomSampler(train_idx, generator=generator),
+                options['batch_size'], drop_last=False,
+            ),
+            **loader_options,
+        )
+        val_loader = torch.utils.data.DataLoader(
+            dataset,
+            sampler=torch.utils.data.BatchSampler(val_idx, options['batch_size'], drop_last=False),
+            **loader_options,
+        )
+
+        # ── Training with early stopping ──
+        optimizer = torch.optim.Adam(model.parameters(), lr=options['learning_rate'])
+        loss_fn = torch.nn.MSELoss(reduction='sum')
+        best_loss, best_state, best_epoch = float('inf'), None, 0
+        history = []
+
+        for epoch in range(1, options['epochs'] + 1):
+            epoch_started = time.perf_counter()
+            model.train()
+            train_loss = 0.0
+            for x, y in train_loader:
+                optimizer.zero_grad()
+                loss = loss_fn(model(x)[:, 0], y)
+                loss.backward()
+                optimizer.step()
+                train_loss += loss.item()
+            train_time = time.perf_counter() - epoch_started
+
+            model.eval()
+            val_loss = 0.0
+            with torch.no_grad():
+                for x, y in val_loader:
+                    val_loss += loss_fn(model(x)[:, 0], y).item()
+
+            train_loss /= len(train_idx)
+            val_loss /= max(len(val_idx), 1)
+            throughput = len(train_idx) / train_time
+            history.append({
+                'epoch': epoch,
+                'train_loss': train_loss,
+                'val_loss': val_loss,
+                'windows_per_second': round(throughput, 1),
+                'seconds': round(time.perf_counter() - epoch_started, 3),
+            })
+
+            improved = val_loss < best_loss
+            if improved:
+                best_loss, best_epoch = val_loss, epoch
+                best_state = {k: v.detach().clone() for k, v in model.state_dict().items()}
+            self.stdout.write(
+                f'  {"✓" if improved else "·"} Epoch {epoch}/{options["epochs"]}  '
+                f'train {train_loss:.5f}  val {val_loss:.5f}  '
+                f'{throughput:,.0f} windows/s  ({history[-1]["seconds"]:.1f}s)'
+            )
+            if epoch - best_epoch >= options['patience']:
+                self.stdout.write(f'  → Early stop: no improvement for {options["patience"]} epochs')
+                break
+
+        # ── Write the bundle ──
+        tmp_dir = os.path.join(os.path.dirname(version_dir), f'.{version}.tmp')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        torch.save(best_state, os.path.join(tmp_dir, MODEL_FILENAME))
+        joblib.dump(scaler, os.path.join(tmp_dir, SCALER_FILENAME))
+        with open(os.path.join(tmp_dir, 'training.json'), 'w') as fh:
+            json.dump({
+                'created_at': timezone.now().isoformat(),
+                'warm_start': options['warm_start'],
+                'dataset': {'path': os.path.abspath(dataset_dir), **metadata},
+                'validation_from': str(cutoff),
+                'best_epoch': best_epoch,
+                'best_val_loss': best_loss,
+                'epochs': history,
+                'options': {
+                    key: options[key] for key in (
+                        'batch_size', 'learning_rate', 'patience', 'val_fraction',
+                        'workers', 'threads', 'seed',
+                    )
+                },
+            }, fh, indent=2)
+        os.replace(tmp_dir, version_dir)
+        self.stdout.write(f'  ✓ Saved epoch {best_epoch} weights to {version_dir}')
+
+        if options['activate']:
+            bundle = model_registry.activate(version)
+            self.stdout.write(f'  ✓ Activated version {version} ({bundle.backend})')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Trained model version {version} in {elapsed:.2f}s — '
+            f'best validation loss {best_loss:.5f} (epoch {best_epoch})'
+        ))
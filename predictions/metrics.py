@@ -0,0 +1,108 @@
+"""
+Forecast Pipeline Metrics
+=========================
+Timing spans around each stage of the forecast pipeline. Every span feeds
+a rolling per-stage latency window (last FORECAST_METRICS_WINDOW samples)
+summarised as p50/p95/p99, and — inside a request — the per-request span
+totals that ServerTimingMiddleware turns into a ``Server-Timing`` header.
+
+Stages:
+  fingerprint    forecast cache key query
+  sales_query    grouped daily-sales query
+  feature_build  (P, 30, 5) feature batch construction
+  predict        scaling + inference + inverse scaling (incl. dispatcher wait,
+                 and every step of a multi-day rollout)
+  scale          feature scaling (compiled scaler)
+  forward        LSTM forward pass
+  inverse_scale  inverse scaling of predicted sales
+  baseline       statistical fallback forecast (baseline.py)
+  persist        writing Prediction rows
+  request        whole request, for requests that ran any of the above
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+from django.conf import settings
+
+_request_spans = ContextVar('forecast_request_spans', default=None)
+
+
+class LatencyRecorder:
+    """Thread-safe rolling latency samples (ms) per stage."""
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, ms):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+            samples.append(ms)
+            self._counts[stage] += 1
+
+    def summary(self):
+        with self._lock:
+            snapshot = {stage: np.array(samples) for stage, samples in self._samples.items()}
+            counts = dict(self._counts)
+
+        summary = {}
+        for stage, samples in snapshot.items():
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            summary[stage] = {
+                'count': counts[stage],
+                'window': len(samples),
+                'mean_ms': round(float(samples.mean()), 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+                'max_ms': round(float(samples.max()), 3),
+            }
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+
+latency = LatencyRecorder(settings.FORECAST_METRICS_WINDOW)
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block as ``stage``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        latency.record(stage, ms)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans[stage] = spans.get(stage, 0.0) + ms
+
+
+@contextmanager
+def collect_spans():
+    """Collect the spans recorded in this context; yields the stage → ms dict."""
+    spans = {}
+    token = _request_spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(token)
+
+
+def server_timing_header(spans):
+    """Format collected spans as a ``Server-Timing`` header value."""
+    return ', '.join(f'{stage};dur={ms:.2f}' for stage, ms in spans.items())
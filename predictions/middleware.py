@@ -0,0 +1,25 @@
+import time
+
+from .metrics import collect_spans, latency, server_timing_header
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a ``Server-Timing`` header listing the forecast pipeline stages
+    that ran during the request, plus the request total. Requests that
+    touch no instrumented stage are left untouched.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect_spans() as spans:
+            response = self.get_response(request)
+
+        if spans:
+            total = (time.perf_counter() - started) * 1000
+            latency.record('request', total)
+            response['Server-Timing'] = server_timing_header(dict(spans, total=total))
+        return response
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-17 05:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('predictions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastWatermark',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast_watermark', serialize=False, to='products.product')),
+                ('last_transaction_id', models.BigIntegerField(default=0, help_text='Newest transaction seen by the last forecast.')),
+                ('price', models.DecimalField(decimal_places=2, help_text='Product price used by the last forecast.', max_digits=10)),
+                ('forecasted_at', models.DateTimeField(help_text='When the product was last forecast.')),
+            ],
+            options={
+                'db_table': 'forecast_watermarks',
+            },
+        ),
+    ]
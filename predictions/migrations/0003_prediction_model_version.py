@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0002_forecastwatermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='model_version',
+            field=models.CharField(blank=True, default='', help_text='Model registry version that produced the forecast.', max_length=50),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0003_prediction_model_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='lower_bound',
+            field=models.FloatField(blank=True, help_text='Lower end of the forecast interval (units), when sampled.', null=True),
+        ),
+        migrations.AddField(
+            model_name='prediction',
+            name='upper_bound',
+            field=models.FloatField(blank=True, help_text='Upper end of the forecast interval (units), when sampled.', null=True),
+        ),
+    ]
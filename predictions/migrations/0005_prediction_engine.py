@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictions', '0004_prediction_interval_bounds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='prediction',
+            name='engine',
+            field=models.CharField(choices=[('lstm', 'LSTM'), ('ewma', 'EWMA'), ('seasonal_naive', 'Seasonal naive'), ('croston', 'Croston')], default='lstm', help_text='Forecaster that produced the prediction.', max_length=20),
+        ),
+    ]
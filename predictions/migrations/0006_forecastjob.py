@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('predictions', '0005_prediction_engine'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=10)),
+                ('params', models.JSONField(default=dict, help_text='Validated batch forecast request.')),
+                ('worker', models.CharField(blank=True, default='', help_text='host:pid of the process whose pool runs the job.', max_length=100)),
+                ('products_total', models.PositiveIntegerField(default=0)),
+                ('products_done', models.PositiveIntegerField(default=0)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('result', models.JSONField(blank=True, help_text='Per-product results once finished.', null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('timings', models.JSONField(blank=True, default=dict, help_text='Queue / run time and per-stage ms.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='forecast_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'forecast_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -3,7 +3,8 @@ LSTM Model Utilities
 ====================
 Handles loading the PyTorch LSTM model and scaler, preprocessing sales data
 into the required (1, 30, 5) tensor, running inference, and inverse-scaling
-the output back to real demand units.
+the output back to real demand units. Many products can be forecast at once
+by stacking their windows into a single (P, 30, 5) batch.
 
 Model contract:
   - Input shape:  (batch, 30, 5)   — 30 days × 5 features
@@ -11,15 +12,26 @@ Model contract:
   - Output:       single float (scaled 0–1), inverse-transform to get units
 """
 
-import math
+import gc
+import time
+import hashlib
 import logging
+import threading
+from concurrent import futures
 from datetime import timedelta
 
 import numpy as np
 import torch
 import torch.nn as nn
-import joblib
 from django.conf import settings
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from .baseline import baseline_forecast
+from .cache import forecast_cache, state_cache
+from .dispatcher import inference_dispatcher
+from .metrics import span
+from .registry import UnknownModelVersion, model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -45,59 +57,274 @@ class DemandLSTM(nn.Module):
 
     def forward(self, x):
         # x shape: (batch, seq_len, input_size)
-        h0 = torch.zeros(self.num_layers, x.size(0), self.hidden_size)
-        c0 = torch.zeros(self.num_layers, x.size(0), self.hidden_size)
-        out, _ = self.lstm(x, (h0, c0))
+        # No explicit (h0, c0): nn.LSTM starts from zeros without allocating them
+        out, _ = self.lstm(x)
         out = self.fc(out[:, -1, :])  # take last time-step
         return out
 
+    def step(self, x, state=None):
+        """
+        Run ``x`` on from an (h, c) ``state`` (zeros when None).
+
+        Returns the last time-step's output and the new state, so a window
+        can be processed in pieces: ``step(x[:, k:], step(x[:, :k])[1])``
+        matches ``forward(x)``.
+        """
+        out, state = self.lstm(x, state)
+        return self.fc(out[:, -1, :]), state
+
+
+# ─────────────────────────────────────────────
+#  CPU inference backends
+# ─────────────────────────────────────────────
+
+INFERENCE_BACKENDS = ('eager', 'traced', 'quantized')
+
+
+def apply_thread_budget(num_threads=None):
+    """Cap torch intra-op threads for this process (0 keeps torch's default)."""
+    if num_threads is None:
+        num_threads = settings.LSTM_NUM_THREADS
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+
+
+def build_inference_model(model, backend):
+    """Return the eval-mode ``model`` prepared for the given CPU backend."""
+    if backend == 'eager':
+        return model
+    if backend == 'traced':
+        example = torch.zeros(1, settings.LSTM_SEQUENCE_LENGTH, settings.LSTM_INPUT_SIZE)
+        with torch.no_grad():
+            return torch.jit.freeze(torch.jit.trace(model, example))
+    if backend == 'quantized':
+        # Dynamic int8 weights for the LSTM and Linear layers
+        return torch.ao.quantization.quantize_dynamic(
+            model, {nn.LSTM, nn.Linear}, dtype=torch.qint8,
+        )
+    raise ValueError(
+        f"Unknown LSTM_INFERENCE_BACKEND '{backend}'. "
+        f"Expected one of: {', '.join(INFERENCE_BACKENDS)}."
+    )
+
+
+def check_backend_parity(reference, candidate, batch_size=32):
+    """Max absolute (scaled) output difference of ``candidate`` vs the eager model."""
+    generator = torch.Generator().manual_seed(0)
+    x = torch.rand(
+        batch_size, settings.LSTM_SEQUENCE_LENGTH, settings.LSTM_INPUT_SIZE,
+        generator=generator,
+    )
+    with torch.no_grad():
+        return (reference(x) - candidate(x)).abs().max().item()
+
+
+# ─────────────────────────────────────────────
+#  Compiled scaler
+# ─────────────────────────────────────────────
+
+class AffineScaler:
+    """
+    The training scaler as plain per-feature ``x * scale + offset`` vectors.
+
+    sklearn validates and copies its input on every transform call, which
+    costs more than the LSTM itself for small batches; this is one fused
+    NumPy op over any (..., 5) array.
+    """
+
+    def __init__(self, scale, offset):
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.offset = np.asarray(offset, dtype=np.float32)
+
+    def transform(self, features):
+        """Scale a (..., 5) feature array (transform only — never fit)."""
+        return np.asarray(features, dtype=np.float32) * self.scale + self.offset
+
+    def inverse_transform_sales(self, values):
+        """Inverse-scale model outputs using only the sales column."""
+        return (np.asarray(values, dtype=np.float32) - self.offset[0]) / self.scale[0]
+
+
+class SklearnScaler:
+    """Same interface over the joblib scaler, for scalers that aren't affine."""
+
+    def __init__(self, scaler):
+        self.scaler = scaler
+
+    def transform(self, features):
+        features = np.asarray(features, dtype=np.float32)
+        flat = features.reshape(-1, features.shape[-1])
+        return self.scaler.transform(flat).reshape(features.shape).astype(np.float32)
+
+    def inverse_transform_sales(self, values):
+        dummy = np.zeros((len(values), settings.LSTM_INPUT_SIZE), dtype=np.float32)
+        dummy[:, 0] = values
+        return self.scaler.inverse_transform(dummy)[:, 0]
+
+
+def compile_scaler(scaler):
+    """
+    Read the affine map off a fitted scaler by probing it with zeros and
+    unit vectors, so any per-feature affine scaler (MinMaxScaler,
+    StandardScaler, …) compiles the same way.
+    """
+    num_features = getattr(scaler, 'n_features_in_', settings.LSTM_INPUT_SIZE)
+    offset = scaler.transform(np.zeros((1, num_features)))[0]
+    scale = scaler.transform(np.eye(num_features)).diagonal() - offset
+    return AffineScaler(scale, offset)
+
+
+def check_scaler_parity(scaler, compiled, rows=256):
+    """
+    Max absolute (scaled) difference of ``compiled`` vs the joblib scaler,
+    over both directions, on inputs reaching past the fitted range (so a
+    clipping scaler fails).
+    """
+    generator = np.random.default_rng(0)
+    scaled = generator.uniform(-0.5, 1.5, size=(rows, len(compiled.scale)))
+    raw = (scaled - compiled.offset) / np.where(compiled.scale == 0, 1, compiled.scale)
+
+    forward = np.abs(scaler.transform(raw) - compiled.transform(raw)).max()
+    dummy = np.zeros_like(scaled)
+    dummy[:, 0] = scaled[:, 0]
+    inverse = np.abs(
+        scaler.inverse_transform(dummy)[:, 0] - compiled.inverse_transform_sales(scaled[:, 0])
+    ).max() * abs(float(compiled.scale[0]))
+    return float(max(forward, inverse))
+
 
 # ─────────────────────────────────────────────
-#  Singleton loader  (loaded once at first use)
+#  Model access  (versioned bundles, see registry.py)
 # ─────────────────────────────────────────────
 
-_model = None
-_scaler = None
+_ready = False
 
 
-def _load_model():
-    """Load model weights and scaler from disk (lazy singleton)."""
-    global _model, _scaler
+def get_bundle(version=None):
+    """
+    Loaded ``ModelBundle`` for ``version`` (default: the active version).
 
-    model_path = settings.AI_MODEL_PATH
-    scaler_path = settings.AI_SCALER_PATH
+    Resolve the bundle once per request and pass it down, so a hot swap
+    mid-request can't mix one version's model with another's scaler.
+    """
+    return model_registry.get(version)
 
-    # Load scaler
-    _scaler = joblib.load(scaler_path)
-    logger.info("Scaler loaded from %s", scaler_path)
 
-    # Load model
-    _model = DemandLSTM(
-        input_size=settings.LSTM_INPUT_SIZE,
-        hidden_size=settings.LSTM_HIDDEN_SIZE,
-        num_layers=settings.LSTM_NUM_LAYERS,
+def preload():
+    """
+    Load the active model bundle, run a warm-up inference and mark this
+    process ready. Meant to run in the gunicorn master before workers
+    fork (see gunicorn.conf.py) so they share the weights copy-on-write
+    and no real forecast pays for the load.
+
+    Returns
+    -------
+    bool — True when the model is loaded and warmed up
+    """
+    global _ready
+
+    started = time.perf_counter()
+    try:
+        bundle = get_bundle()
+    except (FileNotFoundError, UnknownModelVersion) as exc:
+        logger.warning("Model preload skipped: %s", exc)
+        return False
+
+    # Warm-up pass initialises kernels and the intra-op thread pool
+    predict_demand_batch(
+        np.zeros((1, settings.LSTM_SEQUENCE_LENGTH, settings.LSTM_INPUT_SIZE), dtype=np.float32),
+        bundle,
     )
-    _model.load_state_dict(torch.load(model_path, map_location='cpu'))
-    _model.eval()
-    logger.info("LSTM model loaded from %s", model_path)
+
+    # Move everything allocated so far out of the GC's reach so collections
+    # in forked workers don't write to (and un-share) the preloaded pages
+    gc.collect()
+    gc.freeze()
+
+    _ready = True
+    logger.info(
+        "Model %s preloaded and warmed up in %.2fs",
+        bundle.version, time.perf_counter() - started,
+    )
+    return True
+
+
+def is_ready():
+    """Whether this process can serve forecasts without loading the model."""
+    return _ready or model_registry.is_loaded()
 
 
 def get_model():
-    if _model is None:
-        _load_model()
-    return _model
+    return get_bundle().model
 
 
 def get_scaler():
-    if _scaler is None:
-        _load_model()
-    return _scaler
+    return get_bundle().scaler
 
 
 # ─────────────────────────────────────────────
 #  Data preprocessing
 # ─────────────────────────────────────────────
 
+def _promo_channel(dates, promo_flags):
+    """Look up 0/1 promo flags for a datetime64[D] array of dates."""
+    if not promo_flags:
+        return np.zeros(dates.shape, dtype=np.float32)
+    keys = np.array(list(promo_flags.keys()), dtype='datetime64[D]')
+    values = np.array(list(promo_flags.values()), dtype=np.float32)
+    order = np.argsort(keys)
+    keys, values = keys[order], values[order]
+    idx = np.clip(np.searchsorted(keys, dates), 0, len(keys) - 1)
+    return np.where(keys[idx] == dates, values[idx], 0).astype(np.float32)
+
+
+def build_feature_batch(sales, window_ends, prices, promo_flags=None):
+    """
+    Vectorized ``build_feature_matrix`` for many windows at once.
+
+    Parameters
+    ----------
+    sales : np.ndarray of shape (N, 30)
+        Daily sold quantities per window, oldest day first.
+    window_ends : np.ndarray of shape (N,), dtype datetime64[D]
+        Date of the last day in each window.
+    prices : array-like of shape (N,)
+        Product price used for the price feature of each window.
+    promo_flags : dict[str, int] | None
+        Optional mapping of date-string → 0/1 promo flag. Defaults to 0.
+
+    Returns
+    -------
+    np.ndarray of shape (N, 30, 5)
+    """
+    sales = np.asarray(sales, dtype=np.float32)
+    seq_len = sales.shape[1]
+
+    dates = (
+        np.asarray(window_ends, dtype='datetime64[D]')[:, np.newaxis]
+        + np.arange(-(seq_len - 1), 1)
+    )
+    days = dates.astype(np.int64)
+
+    features = np.empty(sales.shape + (5,), dtype=np.float32)
+    features[..., 0] = sales
+    features[..., 1] = np.asarray(prices, dtype=np.float32)[:, np.newaxis]
+    features[..., 2] = _promo_channel(dates, promo_flags)
+    features[..., 3] = (days + 3) % 7  # 1970-01-01 was a Thursday; 0=Monday … 6=Sunday
+    features[..., 4] = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1  # 1–12
+    return features
+
+
+def _promo_grid(dates, calendars, calendar_idx):
+    """Promo channel where row i of ``dates`` uses ``calendars[calendar_idx[i]]``."""
+    promo = np.zeros(dates.shape, dtype=np.float32)
+    for c, promo_flags in enumerate(calendars):
+        rows = calendar_idx == c
+        if promo_flags and rows.any():
+            promo[rows] = _promo_channel(dates[rows], promo_flags)
+    return promo
+
+
 def build_feature_matrix(daily_sales, product_price, promo_flags=None):
     """
     Build a (30, 5) feature matrix from the last 30 days of sales.
@@ -122,31 +349,515 @@ def build_feature_matrix(daily_sales, product_price, promo_flags=None):
         # No sales history — return zeros
         return np.zeros((seq_len, 5), dtype=np.float32)
 
-    # Build a date → qty lookup
-    from datetime import date as dt_date
-    sales_lookup = {row['date']: row['total_qty'] for row in daily_sales}
-
     # Determine the 30-day window ending on the latest date
-    latest_date = max(sales_lookup.keys())
+    latest_date = max(row['date'] for row in daily_sales)
     start_date = latest_date - timedelta(days=seq_len - 1)
 
-    features = []
-    for i in range(seq_len):
-        d = start_date + timedelta(days=i)
-        sales = sales_lookup.get(d, 0)
-        price = float(product_price)
-        promo = (promo_flags or {}).get(str(d), 0)
-        weekday = d.weekday()     # 0=Monday … 6=Sunday
-        month = d.month           # 1–12
-        features.append([sales, price, promo, weekday, month])
+    window = np.zeros((1, seq_len), dtype=np.float32)
+    for row in daily_sales:
+        offset = (row['date'] - start_date).days
+        if 0 <= offset < seq_len:
+            window[0, offset] = row['total_qty']
 
-    return np.array(features, dtype=np.float32)
+    ends = np.array([latest_date], dtype='datetime64[D]')
+    return build_feature_batch(window, ends, [float(product_price)], promo_flags)[0]
+
+
+# ─────────────────────────────────────────────
+#  Bulk sales loading
+# ─────────────────────────────────────────────
+
+def load_daily_sales(product_ids, start_date, end_date):
+    """
+    Load daily sold quantities for many products from the DailySales rollup.
+
+    Parameters
+    ----------
+    product_ids : list[int]
+        Products to load; defines the row order of the result.
+    start_date, end_date : datetime.date
+        Inclusive date range to load.
+
+    Returns
+    -------
+    np.ndarray of shape (P, D) — column j holds sales on ``start_date + j``
+    """
+    from transactions.models import DailySales
+
+    num_days = (end_date - start_date).days + 1
+    sales = np.zeros((len(product_ids), num_days), dtype=np.float32)
+    if not product_ids:
+        return sales
+
+    rows = list(
+        DailySales.objects
+        .filter(product_id__in=product_ids, date__gte=start_date, date__lte=end_date)
+        .values_list('product_id', 'date', 'quantity')
+        .order_by()
+    )
+    if not rows:
+        return sales
+
+    row_of = {pid: i for i, pid in enumerate(product_ids)}
+    row_idx = np.fromiter((row_of[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+    day_idx = np.array([r[1] for r in rows], dtype='datetime64[D]') - np.datetime64(start_date, 'D')
+    sales[row_idx, day_idx.astype(np.int64)] = [r[2] for r in rows]
+    return sales
+
+
+def load_feature_batch(products, end_date=None, promo_flags=None):
+    """
+    Build the (P, 30, 5) batch for ``products`` from one sales query.
+
+    Mirrors ``build_feature_matrix``: each product's window ends on its
+    latest sale within the 30-day look-back, and products without recent
+    sales get an all-zero window.
+
+    Parameters
+    ----------
+    products : list[Product]
+        Products to forecast; defines the row order of the batch.
+    end_date : datetime.date | None
+        Last day of the look-back. Defaults to today in TIME_ZONE.
+    promo_flags : dict[str, int] | None
+        Optional mapping of date-string → 0/1 promo flag.
+
+    Returns
+    -------
+    (np.ndarray of shape (P, 30, 5), np.ndarray of shape (P,) datetime64[D])
+        Features and the end date of each product's window.
+    """
+    seq_len = settings.LSTM_SEQUENCE_LENGTH
+    end_date = end_date or timezone.localdate()
+    start_date = end_date - timedelta(days=seq_len)
+
+    with span('sales_query'):
+        sales = load_daily_sales([p.id for p in products], start_date, end_date)
+
+    with span('feature_build'):
+        features, window_ends = _latest_windows(sales, start_date, products, promo_flags)
+    return features, window_ends
+
+
+def _latest_windows(sales, start_date, products, promo_flags):
+    """Cut each product's 30-day window out of the (P, D) sales matrix."""
+    seq_len = settings.LSTM_SEQUENCE_LENGTH
+
+    # Anchor each window on the product's latest day with sales
+    has_sales = sales.any(axis=1)
+    last_idx = sales.shape[1] - 1 - np.argmax(sales[:, ::-1] > 0, axis=1)
+    idx = last_idx[:, np.newaxis] + np.arange(-(seq_len - 1), 1)
+    windows = np.where(idx >= 0, np.take_along_axis(sales, np.maximum(idx, 0), axis=1), 0)
+
+    window_ends = np.datetime64(start_date, 'D') + last_idx
+    prices = [float(p.price) for p in products]
+    features = build_feature_batch(windows, window_ends, prices, promo_flags)
+    features[~has_sales] = 0
+    return features, window_ends
+
+
+def sliding_windows(sales, start_date, prices, horizon=1, promo_flags=None):
+    """
+    Every historical forecast window of a (P, D) sales matrix, built the
+    way ``load_feature_batch`` would have built it on each past day.
+
+    A forecast is made at the end of each day t that has a full 31-day
+    look-back and ``horizon`` later days to score against; its window is
+    anchored on the product's latest sale within the look-back.
+
+    Parameters
+    ----------
+    sales : np.ndarray of shape (P, D)
+        Output of ``load_daily_sales``.
+    start_date : datetime.date
+        Date of column 0.
+    prices : array-like of shape (P,)
+        Price feature of each product.
+    horizon : int
+        Days after t whose mean daily sales is the target.
+    promo_flags : dict[str, int] | None
+        Optional mapping of date-string → 0/1 promo flag.
+
+    Returns
+    -------
+    (features, targets, product_rows, forecast_dates)
+        (N, 30, 5) windows, (N,) mean daily sales over the next ``horizon``
+        days, (N,) row of each window in ``sales`` and (N,) datetime64[D]
+        day t of each window. Windows are product-major.
+    """
+    seq_len = settings.LSTM_SEQUENCE_LENGTH
+    num_products, num_days = sales.shape
+    ends = np.arange(seq_len, num_days - horizon)
+    if num_products == 0 or len(ends) == 0:
+        return (
+            np.zeros((0, seq_len, 5), dtype=np.float32), np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype='datetime64[D]'),
+        )
+    num_ends = len(ends)
+
+    # Latest sale on or before each day, and whether it is inside that day's look-back
+    positions = np.where(sales > 0, np.arange(num_days), -1)
+    last_sale = np.maximum.accumulate(positions, axis=1)[:, ends]
+    has_sales = last_sale >= ends - seq_len
+
+    idx = last_sale[..., np.newaxis] + np.arange(-(seq_len - 1), 1)
+    windows = np.take_along_axis(sales, np.maximum(idx, 0).reshape(num_products, -1), axis=1)
+    # Days before the look-back aren't loaded live, so they read as 0 here too
+    windows = np.where(idx >= (ends - seq_len)[:, np.newaxis], windows.reshape(idx.shape), 0)
+
+    window_ends = np.datetime64(start_date, 'D') + last_sale
+    features = build_feature_batch(
+        windows.reshape(-1, seq_len), window_ends.reshape(-1),
+        np.repeat(np.asarray(prices, dtype=np.float32), num_ends), promo_flags,
+    )
+    features[~has_sales.reshape(-1)] = 0
+
+    cumulative = np.concatenate([np.zeros((num_products, 1)), np.cumsum(sales, axis=1)], axis=1)
+    targets = (cumulative[:, ends + 1 + horizon] - cumulative[:, ends + 1]) / horizon
+
+    return (
+        features,
+        targets.reshape(-1).astype(np.float32),
+        np.repeat(np.arange(num_products), num_ends),
+        np.tile(np.datetime64(start_date, 'D') + ends, num_products),
+    )
 
 
 # ─────────────────────────────────────────────
 #  Prediction pipeline
 # ─────────────────────────────────────────────
 
+def predict_demand_batch(features, bundle=None, rounded=True):
+    """
+    Batched prediction pipeline for many products at once.
+
+    The whole (P, 30, 5) batch is scaled in one call and pushed through the
+    LSTM in chunks of ``LSTM_INFERENCE_BATCH_SIZE`` windows, so the cost is
+    one forward pass per chunk rather than one per product.
+
+    Parameters
+    ----------
+    features : np.ndarray of shape (P, 30, 5)
+        Output of ``load_feature_batch`` / ``build_feature_batch``.
+    bundle : ModelBundle | None
+        Model version to use. Defaults to the active version.
+    rounded : bool
+        Round up to whole units, as served. False returns the unrounded
+        (non-negative) float demand, e.g. for scoring against mean sales.
+
+    Returns
+    -------
+    np.ndarray of shape (P,) — predicted demand in whole units (int64), or
+    float units when ``rounded`` is False
+    """
+    if len(features) == 0:
+        return np.zeros(0, dtype=np.int64 if rounded else np.float32)
+
+    bundle = bundle or get_bundle()
+    model, scaler = bundle.model, bundle.feature_scaler
+    chunk_size = settings.LSTM_INFERENCE_BATCH_SIZE
+
+    with span('scale'):
+        features_scaled = scaler.transform(features)
+
+    raw_values = np.empty(len(features_scaled), dtype=np.float32)
+    with span('forward'), torch.no_grad():
+        for start in range(0, len(features_scaled), chunk_size):
+            tensor = torch.from_numpy(features_scaled[start:start + chunk_size])
+            raw_values[start:start + chunk_size] = model(tensor)[:, 0].numpy()
+
+    with span('inverse_scale'):
+        predicted_units = scaler.inverse_transform_sales(raw_values)
+
+    predicted_units = np.maximum(predicted_units, 0)
+    if not rounded:
+        return predicted_units
+    # Round up — can't sell fractional units
+    return np.ceil(predicted_units).astype(np.int64)
+
+
+def _prefix_digest(window):
+    """Digest of every row of a (30, 5) window but the last."""
+    return hashlib.blake2b(window[:-1].tobytes(), digest_size=16).digest()
+
+
+def predict_demand_incremental(features, product_ids, bundle=None):
+    """
+    ``predict_demand_batch`` that reuses each product's LSTM state.
+
+    The state after the first 29 days of a product's window is cached
+    (see ``HiddenStateCache``). When the next forecast's window starts with
+    the same 29 rows — more sales arrived on the window's last day — only
+    the final time-step is run from the cached state. Any other change
+    (the window slid forward, price changed, new model identity) replays
+    the full window and refreshes the cached state.
+
+    Always runs the bundle's eager model, whose LSTM accepts a state.
+
+    Parameters
+    ----------
+    features : np.ndarray of shape (P, 30, 5)
+    product_ids : list[int]
+        Product of each window; keys the cached states.
+    bundle : ModelBundle | None
+        Model version to use. Defaults to the active version.
+
+    Returns
+    -------
+    np.ndarray of shape (P,) — predicted demand in whole units
+    """
+    if len(features) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    bundle = bundle or get_bundle()
+    model, scaler = bundle.eager_model, bundle.feature_scaler
+    chunk_size = settings.LSTM_INFERENCE_BATCH_SIZE
+    features = np.asarray(features, dtype=np.float32)
+
+    with span('scale'):
+        features_scaled = scaler.transform(features)
+
+    keys = [(pid, bundle.identity) for pid in product_ids]
+    digests = [_prefix_digest(window) for window in features]
+    states = [state_cache.get(key, digest) for key, digest in zip(keys, digests)]
+    hit_idx = np.array([i for i, state in enumerate(states) if state is not None], dtype=np.int64)
+    miss_idx = np.array([i for i, state in enumerate(states) if state is None], dtype=np.int64)
+
+    raw_values = np.empty(len(features_scaled), dtype=np.float32)
+    with span('forward'), torch.no_grad():
+        # Cached prefixes: one time-step each
+        for start in range(0, len(hit_idx), chunk_size):
+            idx = hit_idx[start:start + chunk_size]
+            h = torch.cat([states[i][0] for i in idx], dim=1)
+            c = torch.cat([states[i][1] for i in idx], dim=1)
+            out, _ = model.step(torch.from_numpy(features_scaled[idx, -1:]), (h, c))
+            raw_values[idx] = out[:, 0].numpy()
+
+        # Full replay, split after the prefix so its state can be kept
+        for start in range(0, len(miss_idx), chunk_size):
+            idx = miss_idx[start:start + chunk_size]
+            tensor = torch.from_numpy(features_scaled[idx])
+            _, (h, c) = model.step(tensor[:, :-1])
+            out, _ = model.step(tensor[:, -1:], (h, c))
+            raw_values[idx] = out[:, 0].numpy()
+            for j, i in enumerate(idx):
+                # clone() so an entry doesn't pin the whole chunk's state
+                state_cache.set(keys[i], digests[i], (h[:, j:j + 1].clone(), c[:, j:j + 1].clone()))
+
+    with span('inverse_scale'):
+        predicted_units = scaler.inverse_transform_sales(raw_values)
+
+    return np.ceil(np.maximum(predicted_units, 0)).astype(np.int64)
+
+
+def run_inference(features, bundle=None, product_ids=None, timeout=None):
+    """
+    ``predict_demand_batch`` for request handlers: small batches are routed
+    through the micro-batching dispatcher when FORECAST_DISPATCH_ENABLED,
+    so concurrent requests share one forward pass; ``timeout`` (seconds)
+    bounds the wait there and raises ``TimeoutError``. With
+    LSTM_INCREMENTAL_INFERENCE, windows of known ``product_ids`` go through
+    ``predict_demand_incremental`` instead.
+    """
+    bundle = bundle or get_bundle()
+    with span('predict'):
+        if settings.LSTM_INCREMENTAL_INFERENCE and product_ids is not None:
+            return predict_demand_incremental(features, product_ids, bundle)
+        if settings.FORECAST_DISPATCH_ENABLED:
+            return inference_dispatcher.predict(features, bundle, timeout)
+        return predict_demand_batch(features, bundle)
+
+
+def predict_demand_rollout(features, window_ends, first_date, days, bundle=None, promo_flags=None,
+                           promo_rows=None):
+    """
+    Autoregressive multi-day forecast for many products at once.
+
+    Each step runs the whole batch through the model, then slides every
+    window forward one day: the day's predicted units become the sales
+    feature of the new row, price is carried over and the promo, weekday
+    and month features are computed for the new date. A window ending
+    before ``first_date - 1`` (no sales for a few days) is first rolled
+    through the gap, so every product's forecast starts on ``first_date``.
+
+    Cost is one batched forward pass per step — ``days`` plus the largest
+    gap — independent of the number of products.
+
+    Parameters
+    ----------
+    features : np.ndarray of shape (P, 30, 5)
+        Output of ``load_feature_batch``.
+    window_ends : np.ndarray of shape (P,), dtype datetime64[D]
+        Last day of each window (from ``load_feature_batch``).
+    first_date : datetime.date
+        First forecast day.
+    days : int
+        Number of days to forecast.
+    bundle : ModelBundle | None
+        Model version to use. Defaults to the active version.
+    promo_flags : dict[str, int] | None
+        Optional mapping of date-string → 0/1 promo flag for future days.
+    promo_rows : (list[dict[str, int]], np.ndarray of shape (P,)) | None
+        Per-row promo calendars instead of ``promo_flags``: the calendars
+        and the index of the calendar each row uses.
+
+    Returns
+    -------
+    np.ndarray of shape (P, days) — predicted demand per day in whole units
+    """
+    num_products = len(features)
+    if num_products == 0:
+        return np.zeros((0, days), dtype=np.int64)
+
+    bundle = bundle or get_bundle()
+    model, scaler = bundle.model, bundle.feature_scaler
+    chunk_size = settings.LSTM_INFERENCE_BATCH_SIZE
+
+    features = np.asarray(features, dtype=np.float32)
+    window_ends = np.asarray(window_ends, dtype='datetime64[D]')
+    gaps = np.maximum((np.datetime64(first_date, 'D') - window_ends).astype(np.int64) - 1, 0)
+    prices = features[:, -1, 1]
+    rows = np.arange(num_products)
+
+    with span('scale'):
+        window = scaler.transform(features)
+
+    predicted_units = np.zeros((num_products, days), dtype=np.float32)
+    raw_values = np.empty(num_products, dtype=np.float32)
+    for step in range(int(gaps.max()) + days):
+        with span('forward'), torch.no_grad():
+            for start in range(0, num_products, chunk_size):
+                tensor = torch.from_numpy(window[start:start + chunk_size])
+                raw_values[start:start + chunk_size] = model(tensor)[:, 0].numpy()
+
+        with span('inverse_scale'):
+            units = np.maximum(scaler.inverse_transform_sales(raw_values), 0).astype(np.float32)
+
+        day = step - gaps
+        in_horizon = (day >= 0) & (day < days)
+        predicted_units[rows[in_horizon], day[in_horizon]] = units[in_horizon]
+
+        # Slide every window forward one day, feeding the prediction back
+        with span('scale'):
+            new_dates = window_ends + step + 1
+            new_rows = build_feature_batch(units[:, np.newaxis], new_dates, prices, promo_flags)
+            if promo_rows is not None:
+                new_rows[:, 0, 2] = _promo_grid(new_dates[:, np.newaxis], *promo_rows)[:, 0]
+            window = np.concatenate([window[:, 1:], scaler.transform(new_rows)], axis=1)
+
+    # Round up — can't sell fractional units
+    return np.ceil(predicted_units).astype(np.int64)
+
+
+_dropout_model_lock = threading.Lock()
+
+
+def _dropout_model(bundle):
+    """Train-mode twin of the bundle's eager model sharing its weights, so dropout stays active."""
+    if bundle.dropout_model is None:
+        with _dropout_model_lock:
+            if bundle.dropout_model is None:
+                model = DemandLSTM(
+                    input_size=settings.LSTM_INPUT_SIZE,
+                    hidden_size=settings.LSTM_HIDDEN_SIZE,
+                    num_layers=settings.LSTM_NUM_LAYERS,
+                )
+                model.load_state_dict(bundle.eager_model.state_dict(), assign=True)
+                model.requires_grad_(False)
+                bundle.dropout_model = model.train()
+    return bundle.dropout_model
+
+
+def mc_sample_count(num_products, samples=None):
+    """
+    Dropout samples per product that fit the FORECAST_MC_MAX_ROWS budget
+    (never fewer than 2, so a spread can always be estimated).
+    """
+    samples = samples or settings.FORECAST_MC_SAMPLES
+    budget = settings.FORECAST_MC_MAX_ROWS // max(num_products, 1)
+    return max(2, min(samples, budget))
+
+
+def predict_demand_uncertainty(features, bundle=None, samples=None):
+    """
+    Monte-Carlo dropout forecast for many products at once.
+
+    Each window is repeated K times and the whole (P·K, 30, 5) batch runs
+    through a train-mode copy of the model, so the LSTM's inter-layer
+    dropout draws a different mask per row — K stochastic forecasts per
+    product from one batched pass. K is ``samples`` (default
+    FORECAST_MC_SAMPLES) capped by ``mc_sample_count``.
+
+    Parameters
+    ----------
+    features : np.ndarray of shape (P, 30, 5)
+    bundle : ModelBundle | None
+        Model version to use. Defaults to the active version.
+    samples : int | None
+        Requested dropout samples per product.
+
+    Returns
+    -------
+    dict of np.ndarray of shape (P,)
+        ``predicted`` (deterministic forecast, whole units), ``mean``,
+        ``std``, ``lower`` and ``upper`` (FORECAST_INTERVAL quantiles,
+        rounded outwards to whole units) of the sampled demand, and ``confidence`` in 0–1 (1 − std / mean,
+        clipped). Also ``samples``: the K actually used.
+    """
+    num_products = len(features)
+    samples = mc_sample_count(num_products, samples)
+    predicted = predict_demand_batch(features, bundle)
+    if num_products == 0:
+        empty = np.zeros(0, dtype=np.float32)
+        return {'predicted': predicted, 'mean': empty, 'std': empty, 'lower': empty,
+                'upper': empty, 'confidence': empty, 'samples': samples}
+
+    bundle = bundle or get_bundle()
+    model, scaler = _dropout_model(bundle), bundle.feature_scaler
+    chunk_size = settings.LSTM_INFERENCE_BATCH_SIZE
+
+    with span('scale'):
+        features_scaled = torch.from_numpy(scaler.transform(features))
+        repeated = features_scaled.repeat_interleave(samples, dim=0)  # rows p·K … p·K+K-1 are product p
+
+    raw_values = np.empty(len(repeated), dtype=np.float32)
+    with span('forward'), torch.no_grad():
+        for start in range(0, len(repeated), chunk_size):
+            raw_values[start:start + chunk_size] = model(repeated[start:start + chunk_size])[:, 0].numpy()
+
+    with span('inverse_scale'):
+        units = np.maximum(scaler.inverse_transform_sales(raw_values), 0).reshape(num_products, samples)
+
+    tail = (1 - settings.FORECAST_INTERVAL) / 2
+    mean, std = units.mean(axis=1), units.std(axis=1)
+    lower, upper = np.quantile(units, [tail, 1 - tail], axis=1)
+    return {
+        'predicted': predicted,
+        'mean': mean,
+        'std': std,
+        'lower': np.floor(lower),  # whole units, widened outwards
+        'upper': np.ceil(upper),
+        'confidence': np.clip(1 - std / np.maximum(mean, 1), 0, 1),
+        'samples': samples,
+    }
+
+
+def forecast_uncertainty(products, end_date=None, bundle=None, samples=None):
+    """
+    ``predict_demand_uncertainty`` for ``products``' current windows.
+
+    Not memoized: every call draws fresh dropout samples.
+    """
+    features, _ = load_feature_batch(products, end_date)
+    with span('predict'):
+        return predict_demand_uncertainty(features, bundle, samples)
+
+
+def predict_version_batch(features, version, rounded=True):
+    """``predict_demand_batch`` against a named version (picklable for process pools)."""
+    return predict_demand_batch(features, get_bundle(version), rounded)
+
+
 def predict_demand(daily_sales, product_price, promo_flags=None):
     """
     Full prediction pipeline:
@@ -160,31 +871,219 @@ def predict_demand(daily_sales, product_price, promo_flags=None):
     -------
     int — predicted demand in whole units
     """
-    model = get_model()
-    scaler = get_scaler()
-
-    # Step 1 — features
     features = build_feature_matrix(daily_sales, product_price, promo_flags)
+    return int(run_inference(features[np.newaxis])[0])
 
-    # Step 2 — scale (transform only, DO NOT fit)
-    features_scaled = scaler.transform(features)
 
-    # Step 3 — tensor
-    tensor = torch.FloatTensor(features_scaled).unsqueeze(0)  # (1, 30, 5)
+# ─────────────────────────────────────────────
+#  What-if scenarios
+# ─────────────────────────────────────────────
 
-    # Step 4 — inference
-    with torch.no_grad():
-        raw_output = model(tensor)  # shape (1, 1)
+def build_scenario_batch(features, window_ends, price_multipliers, promo_calendars):
+    """
+    Stack every (price multiplier, promo calendar) variant of each window.
 
-    raw_value = raw_output.item()
+    Parameters
+    ----------
+    features : np.ndarray of shape (P, 30, 5)
+        Output of ``load_feature_batch``.
+    window_ends : np.ndarray of shape (P,), dtype datetime64[D]
+    price_multipliers : list[float]
+        M factors applied to the price feature.
+    promo_calendars : list[dict[str, int] | None]
+        C mappings of date-string → 0/1 promo flag replacing the promo
+        feature.
 
-    # Step 5 — inverse scale
-    # The model outputs a single scaled value (the sales column).
-    # We need to inverse-transform using only the first column of the scaler.
-    dummy = np.zeros((1, 5), dtype=np.float32)
-    dummy[0, 0] = raw_value
-    inversed = scaler.inverse_transform(dummy)
-    predicted_units = inversed[0, 0]
+    Returns
+    -------
+    (np.ndarray of shape (P·M·C, 30, 5), np.ndarray of shape (P·M·C,))
+        Variants in (product, multiplier, calendar) order and the calendar
+        index of each row. Windows without sales history stay all-zero.
+    """
+    num_products, seq_len, num_features = features.shape
+    num_prices, num_calendars = len(price_multipliers), len(promo_calendars)
 
-    # Round up — can't sell fractional units
-    return math.ceil(max(predicted_units, 0))
+    dates = np.asarray(window_ends, dtype='datetime64[D]')[:, np.newaxis] + np.arange(-(seq_len - 1), 1)
+    calendar_idx = np.arange(num_calendars)
+
+    batch = np.empty((num_products, num_prices, num_calendars, seq_len, num_features), dtype=np.float32)
+    batch[:] = features[:, np.newaxis, np.newaxis]
+    batch[..., 1] *= np.asarray(price_multipliers, dtype=np.float32)[:, np.newaxis, np.newaxis]
+    for c in calendar_idx:
+        batch[:, :, c, :, 2] = _promo_grid(dates, promo_calendars, np.full(num_products, c))[:, np.newaxis]
+    batch[~features.any(axis=(1, 2))] = 0
+
+    return (
+        batch.reshape(-1, seq_len, num_features),
+        np.tile(calendar_idx, num_products * num_prices),
+    )
+
+
+def predict_scenarios(products, price_multipliers, promo_calendars, bundle=None,
+                      rollout_days=None, end_date=None):
+    """
+    Demand surface of ``products`` under every price / promo variant.
+
+    Sales are loaded once; all P·M·C variants then run as one stacked
+    batch (or one batched rollout with ``rollout_days``).
+
+    Returns
+    -------
+    np.ndarray of shape (P, M, C) — predicted units per day, or
+    (P, M, C, rollout_days) — daily units of the rollout
+    """
+    end_date = end_date or timezone.localdate()
+    features, window_ends = load_feature_batch(products, end_date)
+    shape = (len(products), len(price_multipliers), len(promo_calendars))
+
+    with span('feature_build'):
+        batch, calendar_idx = build_scenario_batch(
+            features, window_ends, price_multipliers, promo_calendars,
+        )
+
+    with span('predict'):
+        if rollout_days is None:
+            return predict_demand_batch(batch, bundle).reshape(shape)
+        predicted = predict_demand_rollout(
+            batch, np.repeat(window_ends, shape[1] * shape[2]),
+            end_date + timedelta(days=1), rollout_days, bundle,
+            promo_rows=(promo_calendars, calendar_idx),
+        )
+        return predicted.reshape(shape + (rollout_days,))
+
+
+# ─────────────────────────────────────────────
+#  Memoized forecasting
+# ─────────────────────────────────────────────
+
+def _sales_fingerprints(product_ids, start_date, end_date):
+    """Transaction count, units sold and last sale day in each product's sales window."""
+    from transactions.models import DailySales
+
+    rows = (
+        DailySales.objects
+        .filter(product_id__in=product_ids, date__gte=start_date, date__lte=end_date)
+        .values('product_id')
+        .annotate(count=Sum('transaction_count'), units=Sum('quantity'), last_day=Max('date'))
+        .order_by()
+    )
+    return {row['product_id']: (row['count'], row['units'], row['last_day']) for row in rows}
+
+
+def forecast_products(products, end_date=None, bundle=None, rollout_days=None, timeout=None):
+    """
+    Forecast ``products``, serving unchanged sales windows from memory.
+
+    A cheap fingerprint query decides which products still match a cached
+    result; only the rest go through ``load_feature_batch`` and
+    ``predict_demand_batch``. ``bundle`` defaults to the active version.
+    With ``rollout_days``, each product gets a day-by-day forecast for the
+    ``rollout_days`` days after ``end_date`` from ``predict_demand_rollout``.
+    ``timeout`` is passed on to ``run_inference``.
+
+    Returns
+    -------
+    (np.ndarray of shape (P,) or (P, rollout_days) int64, np.ndarray of shape (P,) bool)
+        Predicted units per product and which of them were cache hits.
+    """
+    bundle = bundle or get_bundle()
+    end_date = end_date or timezone.localdate()
+    start_date = end_date - timedelta(days=settings.LSTM_SEQUENCE_LENGTH)
+
+    with span('fingerprint'):
+        fingerprints = _sales_fingerprints([p.id for p in products], start_date, end_date)
+    keys = [
+        (p.id, end_date, fingerprints.get(p.id), str(p.price), bundle.identity, rollout_days)
+        for p in products
+    ]
+
+    shape = (len(products),) if rollout_days is None else (len(products), rollout_days)
+    predicted = np.zeros(shape, dtype=np.int64)
+    hits = np.zeros(len(products), dtype=bool)
+    for i, key in enumerate(keys):
+        value = forecast_cache.get(key)
+        if value is not None:
+            predicted[i] = value
+            hits[i] = True
+
+    misses = np.flatnonzero(~hits)
+    if len(misses):
+        features, window_ends = load_feature_batch([products[i] for i in misses], end_date)
+        if rollout_days is None:
+            predicted[misses] = run_inference(
+                features, bundle, [products[i].id for i in misses], timeout,
+            )
+        else:
+            with span('predict'):
+                predicted[misses] = predict_demand_rollout(
+                    features, window_ends, end_date + timedelta(days=1), rollout_days, bundle,
+                )
+        for i in misses:
+            value = predicted[i]
+            forecast_cache.set(keys[i], int(value) if rollout_days is None else tuple(value.tolist()))
+
+    return predicted, hits
+
+
+# ─────────────────────────────────────────────
+#  Engine selection  (LSTM with baseline fallback)
+# ─────────────────────────────────────────────
+
+def forecast_baseline(products, method='auto', end_date=None, rollout_days=None):
+    """
+    Statistical forecast of ``products`` from the same windows the LSTM uses.
+
+    ``method`` is a baseline method or 'auto' (see baseline.py). Without
+    ``rollout_days`` the flat per-day value is the mean over one week.
+
+    Returns
+    -------
+    (np.ndarray of shape (P,) or (P, rollout_days) int64, np.ndarray of shape (P,) str)
+        Predicted units and the method used for each product.
+    """
+    end_date = end_date or timezone.localdate()
+    features, window_ends = load_feature_batch(products, end_date)
+    with span('baseline'):
+        daily, methods = baseline_forecast(
+            features[..., 0], window_ends, end_date + timedelta(days=1),
+            rollout_days or 7, method,
+        )
+        if rollout_days is None:
+            daily = daily.mean(axis=1)
+    return np.ceil(daily).astype(np.int64), methods
+
+
+def forecast_with_engine(products, engine='lstm', model_version=None, rollout_days=None, end_date=None):
+    """
+    Forecast ``products`` with the requested engine.
+
+    'lstm' runs ``forecast_products`` and, when FORECAST_FALLBACK_ENABLED,
+    falls back to the automatic baseline if the model files are missing
+    or the dispatcher wait exceeds FORECAST_LATENCY_BUDGET_MS. 'baseline'
+    picks a baseline method per product; the other engines force one.
+
+    Returns
+    -------
+    (predicted, hits, engines, bundle)
+        As ``forecast_products``, plus the engine that produced each
+        product's forecast and the ModelBundle used (None without LSTM).
+    """
+    no_hits = np.zeros(len(products), dtype=bool)
+    if engine != 'lstm':
+        method = 'auto' if engine == 'baseline' else engine
+        predicted, engines = forecast_baseline(products, method, end_date, rollout_days)
+        return predicted, no_hits, engines, None
+
+    budget = settings.FORECAST_LATENCY_BUDGET_MS / 1000 or None
+    try:
+        bundle = get_bundle(model_version)
+        predicted, hits = forecast_products(products, end_date, bundle, rollout_days, budget)
+    except (FileNotFoundError, futures.TimeoutError) as exc:
+        if not settings.FORECAST_FALLBACK_ENABLED:
+            raise
+        reason = 'latency budget exceeded' if isinstance(exc, futures.TimeoutError) else exc
+        logger.warning("LSTM forecast unavailable (%s); using baseline", reason)
+        predicted, engines = forecast_baseline(products, 'auto', end_date, rollout_days)
+        return predicted, no_hits, engines, None
+
+    return predicted, hits, np.full(len(products), 'lstm'), bundle
@@ -1,9 +1,102 @@
-from django.db import models
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def _daily_values(values, days):
+    """Expand a flat forecast to ``days`` values; pass daily ones through."""
+    try:
+        return [float(v) for v in values]
+    except TypeError:
+        return [float(values)] * days
+
+
+class PredictionManager(models.Manager):
+
+    def bulk_upsert(self, predictions):
+        """
+        Insert or update unsaved ``predictions`` on the (product,
+        prediction_date) unique key with a few multi-row statements, all
+        in one transaction.
+        """
+        if not predictions:
+            return
+        kwargs = {
+            'update_conflicts': True,
+            'update_fields': [
+                'predicted_demand', 'confidence', 'lower_bound', 'upper_bound',
+                'model_version', 'engine',
+            ],
+        }
+        if connections[self.db].features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['product', 'prediction_date']  # MySQL infers the key
+        with transaction.atomic(using=self.db):
+            self.bulk_create(predictions, **kwargs)
+
+    def with_latest(self, products, *fields):
+        """
+        Annotate a Product queryset with ``latest_<field>`` for each of
+        ``fields``, taken from the product's latest-dated prediction (None
+        without one). Each field is a correlated subquery served by the
+        (product, prediction_date) unique index, so the whole lookup is one
+        query however many products there are.
+        """
+        latest = self.filter(product=OuterRef('pk')).order_by('-prediction_date')
+        return products.annotate(**{
+            f'latest_{field}': Subquery(latest.values(field)[:1]) for field in fields
+        })
+
+    def store_horizon(self, products, predicted, days_ahead, model_version='', intervals=None,
+                      engines='lstm'):
+        """
+        Upsert each product's forecast for the next ``days_ahead`` days and
+        return a (lazy) queryset of the stored rows. A product's entry in
+        ``predicted`` is either one value for every day (flat forecast) or
+        a sequence of ``days_ahead`` daily values (rollout). ``intervals``
+        optionally gives each product's (confidence, lower_bound,
+        upper_bound), stored on every day of its horizon. ``engines`` is
+        one engine name for all products or one per product.
+        """
+        today = timezone.localdate()  # the business day the planner and KPIs select on
+        pred_dates = [today + timedelta(days=i) for i in range(1, days_ahead + 1)]
+        if intervals is None:
+            intervals = [(None, None, None)] * len(products)
+        if isinstance(engines, str):
+            engines = [engines] * len(products)
+        self.bulk_upsert([
+            Prediction(
+                product=product, prediction_date=pred_date,
+                predicted_demand=value, model_version=model_version,
+                confidence=confidence, lower_bound=lower, upper_bound=upper,
+                engine=str(engine),
+            )
+            for product, values, (confidence, lower, upper), engine
+            in zip(products, predicted, intervals, engines)
+            for pred_date, value in zip(pred_dates, _daily_values(values, days_ahead))
+        ])
+        return (
+            self.filter(
+                product__in=products,
+                prediction_date__range=(pred_dates[0], pred_dates[-1]),
+            )
+            .select_related('product')
+            .order_by('product_id', 'prediction_date')
+        )
 
 
 class Prediction(models.Model):
     """Stores LSTM demand forecast results."""
 
+    ENGINE_CHOICES = (
+        ('lstm', 'LSTM'),
+        ('ewma', 'EWMA'),
+        ('seasonal_naive', 'Seasonal naive'),
+        ('croston', 'Croston'),
+    )
+
     product = models.ForeignKey(
         'products.Product', on_delete=models.CASCADE, related_name='predictions'
     )
@@ -13,8 +106,26 @@ class Prediction(models.Model):
         null=True, blank=True,
         help_text='Optional confidence score (0–1).',
     )
+    lower_bound = models.FloatField(
+        null=True, blank=True,
+        help_text='Lower end of the forecast interval (units), when sampled.',
+    )
+    upper_bound = models.FloatField(
+        null=True, blank=True,
+        help_text='Upper end of the forecast interval (units), when sampled.',
+    )
+    model_version = models.CharField(
+        max_length=50, blank=True, default='',
+        help_text='Model registry version that produced the forecast.',
+    )
+    engine = models.CharField(
+        max_length=20, choices=ENGINE_CHOICES, default='lstm',
+        help_text='Forecaster that produced the prediction.',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PredictionManager()
+
     class Meta:
         db_table = 'predictions'
         ordering = ['-created_at']
@@ -22,3 +133,74 @@ class Prediction(models.Model):
 
     def __str__(self):
         return f"{self.product.name} — {self.predicted_demand:.0f} units on {self.prediction_date}"
+
+
+class ForecastWatermark(models.Model):
+    """Sales state each product was last forecast from (drives incremental refresh)."""
+
+    product = models.OneToOneField(
+        'products.Product', on_delete=models.CASCADE,
+        primary_key=True, related_name='forecast_watermark',
+    )
+    last_transaction_id = models.BigIntegerField(
+        default=0, help_text='Newest transaction seen by the last forecast.',
+    )
+    price = models.DecimalField(
+        max_digits=10, decimal_places=2,
+        help_text='Product price used by the last forecast.',
+    )
+    forecasted_at = models.DateTimeField(help_text='When the product was last forecast.')
+
+    class Meta:
+        db_table = 'forecast_watermarks'
+
+    def __str__(self):
+        return f"{self.product_id} @ txn {self.last_transaction_id} ({self.forecasted_at:%Y-%m-%d %H:%M})"
+
+
+class ForecastJob(models.Model):
+    """A batch forecast run in the background (see predictions/jobs.py)."""
+
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    )
+    FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    params = models.JSONField(default=dict, help_text='Validated batch forecast request.')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='forecast_jobs',
+    )
+    worker = models.CharField(
+        max_length=100, blank=True, default='',
+        help_text='host:pid of the process whose pool runs the job.',
+    )
+    products_total = models.PositiveIntegerField(default=0)
+    products_done = models.PositiveIntegerField(default=0)
+    cancel_requested = models.BooleanField(default=False)
+    result = models.JSONField(null=True, blank=True, help_text='Per-product results once finished.')
+    error = models.TextField(blank=True, default='')
+    timings = models.JSONField(default=dict, blank=True, help_text='Queue / run time and per-stage ms.')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'forecast_jobs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Forecast job {self.pk} ({self.status}, {self.products_done}/{self.products_total})"
+
+    @property
+    def progress(self):
+        return round(self.products_done / self.products_total, 4) if self.products_total else 0.0
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
@@ -0,0 +1,195 @@
+"""
+Restock Planner
+===============
+Restocking plan for the whole catalog in one vectorized pass. Stock,
+thresholds, lead times and service levels come from one product query,
+every stored forecast day from today on from one prediction query; both
+are laid out as (P,) / (P, H) NumPy arrays and planned together:
+
+  daily_demand    mean forecast units/day over the stored horizon (the
+                  latest stored prediction when none is current)
+  sigma           daily demand std: from the forecast interval when the
+                  forecast was sampled, else the spread of a rollout
+                  horizon, else Poisson (sqrt of daily_demand)
+  lead_demand     forecast units over the next L = lead_time_days days
+                  (days past the horizon continue at daily_demand)
+  safety_stock    z(service_level) · sigma · sqrt(L)
+  reorder_point   lead_demand + safety_stock
+  days_of_cover   days until cumulative forecast demand exceeds stock
+  order_quantity  up to reorder_point + RESTOCK_REVIEW_DAYS of demand,
+                  once stock is at or below the reorder point
+
+Urgency: critical when an order is due and stock runs out before it could
+arrive (days_of_cover < L) or is at the low-stock threshold; warning when
+an order is due otherwise; ok when none is.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from products.models import Product
+from .models import Prediction
+
+URGENCY_LEVELS = ('critical', 'warning', 'ok')
+
+
+def _z_scores(service_levels):
+    """Standard normal quantile of each service level (one inv_cdf per distinct level)."""
+    levels, inverse = np.unique(service_levels, return_inverse=True)
+    return np.array([NormalDist().inv_cdf(level) for level in levels])[inverse]
+
+
+def _load_products():
+    """(P,) arrays of the active catalog, ordered by id."""
+    products = Prediction.objects.with_latest(
+        Product.objects.filter(is_active=True).order_by('id'), 'predicted_demand',
+    )
+    rows = list(products.values_list(
+        'id', 'name', 'quantity', 'low_stock_threshold', 'lead_time_days', 'service_level',
+        'latest_predicted_demand',
+    ))
+    ids, names, quantity, threshold, lead_time, service_level, latest = zip(*rows) if rows else ([],) * 7
+    return {
+        'ids': np.array(ids, dtype=np.int64),
+        'names': list(names),
+        'quantity': np.array(quantity, dtype=np.float64),
+        'threshold': np.array(threshold, dtype=np.float64),
+        'lead_time': np.array(
+            [settings.RESTOCK_LEAD_TIME_DAYS if v is None else v for v in lead_time], dtype=np.int64,
+        ),
+        'service_level': np.array(
+            [settings.RESTOCK_SERVICE_LEVEL if v is None else v for v in service_level], dtype=np.float64,
+        ),
+        'latest': np.array([0 if v is None else v for v in latest], dtype=np.float64),
+    }
+
+
+def _load_horizons(ids, today):
+    """(P, H) forecast units and interval widths per day from ``today`` (NaN where not stored)."""
+    rows = list(
+        Prediction.objects
+        .filter(product__is_active=True, prediction_date__gte=today)
+        .order_by()
+        .values_list('product_id', 'prediction_date', 'predicted_demand', 'lower_bound', 'upper_bound')
+    )
+    if not rows:
+        empty = np.full((len(ids), 0), np.nan)
+        return empty, empty
+
+    product_ids, dates, demand, lower, upper = zip(*rows)
+    row = np.searchsorted(ids, np.array(product_ids, dtype=np.int64))
+    # date → ordinal is far cheaper than NumPy parsing date objects
+    day = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates)) - today.toordinal()
+    lower = np.array(lower, dtype=np.float64)  # None → NaN
+    upper = np.array(upper, dtype=np.float64)
+
+    units = np.full((len(ids), day.max() + 1), np.nan)
+    widths = np.full_like(units, np.nan)
+    units[row, day] = demand
+    widths[row, day] = upper - lower
+    return units, widths
+
+
+def plan_restock(today=None):
+    """
+    Plan restocking for every active product.
+
+    Returns
+    -------
+    dict of (P,) arrays — ids, names, quantity, threshold, lead_time,
+    service_level, horizon_days, daily_demand, sigma, lead_demand,
+    safety_stock, reorder_point, days_of_cover (inf: never runs out),
+    order_quantity, urgency — plus ``order``: row indices sorted by
+    urgency, then days of cover, then id.
+    """
+    today = today or timezone.localdate()
+    plan = _load_products()
+    units, widths = _load_horizons(plan['ids'], today)
+    num_products = len(plan['ids'])
+    rows = np.arange(num_products)
+    quantity, lead_time = plan['quantity'], plan['lead_time']
+
+    # ── Demand rate and variability ──
+    stored = ~np.isnan(units)
+    horizon_days = stored.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        daily_demand = np.where(
+            horizon_days > 0, np.nansum(units, axis=1) / horizon_days, plan['latest'],
+        )
+        spread = np.sqrt(np.nansum((units - daily_demand[:, np.newaxis]) ** 2, axis=1) / horizon_days)
+        # A central FORECAST_INTERVAL interval spans 2·z standard deviations
+        z_interval = NormalDist().inv_cdf(0.5 + settings.FORECAST_INTERVAL / 2)
+        sampled_days = (~np.isnan(widths)).sum(axis=1)
+        interval_sigma = np.nansum(widths, axis=1) / sampled_days / (2 * z_interval)
+    sigma = np.where(
+        sampled_days > 0, interval_sigma,
+        np.where(spread > 0, spread, np.sqrt(np.maximum(daily_demand, 0))),
+    )
+
+    # ── Cumulative demand, continuing at the daily rate past the horizon ──
+    span = max(units.shape[1], int(lead_time.max(initial=0)), 1)
+    daily = np.full((num_products, span), daily_demand[:, np.newaxis])
+    daily[:, :units.shape[1]] = np.where(stored, units, daily_demand[:, np.newaxis])
+    cumulative = np.concatenate([np.zeros((num_products, 1)), np.cumsum(daily, axis=1)], axis=1)
+
+    lead_demand = cumulative[rows, lead_time]
+    safety_stock = _z_scores(plan['service_level']) * sigma * np.sqrt(lead_time)
+    reorder_point = lead_demand + safety_stock
+
+    # Whole days covered, plus the covered fraction of the day stock runs out
+    covered = (cumulative[:, 1:] <= quantity[:, np.newaxis]).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        within = covered + (quantity - cumulative[rows, covered]) / daily[rows, np.minimum(covered, span - 1)]
+        beyond = np.where(
+            daily_demand > 0, span + (quantity - cumulative[:, -1]) / daily_demand, np.inf,
+        )
+    days_of_cover = np.where(covered < span, within, beyond)
+
+    # ── Orders and urgency ──
+    order_up_to = reorder_point + settings.RESTOCK_REVIEW_DAYS * daily_demand
+    order_quantity = np.where(
+        quantity <= reorder_point, np.ceil(np.maximum(order_up_to - quantity, 0)), 0,
+    ).astype(np.int64)
+    due = order_quantity > 0
+    critical = due & ((days_of_cover < lead_time) | (quantity <= plan['threshold']))
+    rank = np.where(critical, 0, np.where(due, 1, 2))
+
+    plan.update({
+        'horizon_days': horizon_days,
+        'daily_demand': daily_demand,
+        'sigma': sigma,
+        'lead_demand': lead_demand,
+        'safety_stock': safety_stock,
+        'reorder_point': reorder_point,
+        'days_of_cover': days_of_cover,
+        'order_quantity': order_quantity,
+        'urgency': np.array(URGENCY_LEVELS)[rank],
+        'order': np.lexsort((plan['ids'], days_of_cover, rank)),
+    })
+    return plan
+
+
+def plan_rows(plan, indices):
+    """Rows of ``plan`` at ``indices`` as dicts for RecommendationSerializer."""
+    return [
+        {
+            'product_id': int(plan['ids'][i]),
+            'product_name': plan['names'][i],
+            'current_stock': int(plan['quantity'][i]),
+            'predicted_demand': round(float(plan['daily_demand'][i]), 2),
+            'horizon_days': int(plan['horizon_days'][i]),
+            'lead_time_days': int(plan['lead_time'][i]),
+            'service_level': float(plan['service_level'][i]),
+            'safety_stock': round(float(plan['safety_stock'][i]), 2),
+            'reorder_point': round(float(plan['reorder_point'][i]), 2),
+            'days_of_cover': (
+                round(float(plan['days_of_cover'][i]), 1) if np.isfinite(plan['days_of_cover'][i]) else None
+            ),
+            'recommended_restock': int(plan['order_quantity'][i]),
+            'urgency': str(plan['urgency'][i]),
+        }
+        for i in indices
+    ]
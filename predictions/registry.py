@@ -0,0 +1,269 @@
+"""
+Model Registry
+==============
+Versioned model + scaler bundles with hot-swap of the active version.
+
+Layout under AI_MODEL_REGISTRY_DIR (``ml_models/`` by default):
+
+    ml_models/
+        ACTIVE                        ← name of the active version (optional)
+        2026-03-01/
+            inventory_lstm_model.pth
+            data_scaler.gz
+        2026-04-15/
+            ...
+
+The legacy AI_MODEL_PATH / AI_SCALER_PATH pair is always available as the
+``default`` version. Without an ACTIVE pointer, AI_MODEL_VERSION is active.
+
+Every worker checks the ACTIVE pointer's mtime on each lookup, so
+``activate`` in one process rolls the whole deployment forward without a
+restart. Callers hold on to the ``ModelBundle`` they resolved, so a swap
+never pulls weights out from under an in-flight request. A small LRU
+(AI_MODEL_CACHE_SIZE) keeps recently used versions loaded for A/B traffic.
+
+torch is only imported when a bundle is actually loaded, so views can
+import the registry without paying for it.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VERSION = 'default'
+MODEL_FILENAME = 'inventory_lstm_model.pth'
+SCALER_FILENAME = 'data_scaler.gz'
+POINTER_FILENAME = 'ACTIVE'
+
+
+class UnknownModelVersion(LookupError):
+    """Raised when a requested model version has no bundle on disk."""
+
+
+class ModelBundle:
+    """One loaded model version: inference model, eager model and scalers."""
+
+    def __init__(self, version, model, eager_model, scaler, feature_scaler, backend, identity):
+        self.version = version
+        self.model = model              # backend-optimised, used for serving
+        self.eager_model = eager_model  # plain nn.Module (parity checks, stateful modes)
+        self.scaler = scaler                  # joblib scaler as trained
+        self.feature_scaler = feature_scaler  # compiled AffineScaler, used for serving
+        self.backend = backend
+        self.identity = identity        # changes whenever the files on disk change
+        self.dropout_model = None       # train-mode twin for MC dropout, built on first use
+
+    def __repr__(self):
+        return f"<ModelBundle {self.version} ({self.backend})>"
+
+
+def _load_state_dict(path):
+    """Memory-map the checkpoint when torch supports it, else read it normally."""
+    import torch
+
+    try:
+        return torch.load(path, map_location='cpu', mmap=True, weights_only=True), True
+    except (TypeError, RuntimeError):
+        # torch < 2.1, or a legacy (non-zipfile) checkpoint
+        return torch.load(path, map_location='cpu'), False
+
+
+class ModelRegistry:
+    """Thread-safe registry of loaded model versions."""
+
+    def __init__(self, root, cache_size):
+        self.root = str(root)
+        self.cache_size = max(1, cache_size)
+        self._bundles = OrderedDict()
+        self._active = None
+        self._pointer_mtime = None
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    # ── Versions on disk ──
+
+    def paths(self, version):
+        """(model_path, scaler_path) for ``version``."""
+        if version == DEFAULT_VERSION:
+            return settings.AI_MODEL_PATH, settings.AI_SCALER_PATH
+        if not version or os.sep in version or version.startswith('.'):
+            raise UnknownModelVersion(f"Invalid model version '{version}'.")
+        directory = os.path.join(self.root, version)
+        return os.path.join(directory, MODEL_FILENAME), os.path.join(directory, SCALER_FILENAME)
+
+    def available_versions(self):
+        """Versions with both a model and a scaler file on disk."""
+        versions = []
+        if os.path.exists(settings.AI_MODEL_PATH) and os.path.exists(settings.AI_SCALER_PATH):
+            versions.append(DEFAULT_VERSION)
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                directory = os.path.join(self.root, name)
+                if name.startswith('.') or not os.path.isdir(directory):
+                    continue
+                if (os.path.isfile(os.path.join(directory, MODEL_FILENAME))
+                        and os.path.isfile(os.path.join(directory, SCALER_FILENAME))):
+                    versions.append(name)
+        return versions
+
+    # ── Active version ──
+
+    def _pointer_path(self):
+        return os.path.join(self.root, POINTER_FILENAME)
+
+    def active_version(self):
+        """Name of the active version, re-reading the ACTIVE pointer if it changed."""
+        try:
+            mtime = os.stat(self._pointer_path()).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        with self._lock:
+            if self._active is None or mtime != self._pointer_mtime:
+                active = settings.AI_MODEL_VERSION
+                if mtime is not None:
+                    with open(self._pointer_path()) as fh:
+                        active = fh.read().strip() or active
+                if self._active is not None and active != self._active:
+                    logger.info("Active model version changed: %s → %s", self._active, active)
+                self._active, self._pointer_mtime = active, mtime
+            return self._active
+
+    def activate(self, version):
+        """
+        Load ``version`` and make it active for every worker.
+
+        The bundle is loaded (and parity-checked) before the pointer moves,
+        so a broken bundle never becomes active.
+        """
+        bundle = self.get(version)
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._pointer_path() + '.tmp'
+        with open(tmp_path, 'w') as fh:
+            fh.write(version + '\n')
+        os.replace(tmp_path, self._pointer_path())  # atomic swap
+        with self._lock:
+            self._active = version
+            self._pointer_mtime = os.stat(self._pointer_path()).st_mtime_ns
+        logger.info("Activated model version %s", version)
+        return bundle
+
+    # ── Loaded bundles ──
+
+    def get(self, version=None):
+        """Return the loaded bundle for ``version`` (default: the active one)."""
+        version = version or self.active_version()
+        with self._lock:
+            bundle = self._lookup(version)
+            if bundle is not None:
+                return bundle
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+
+        # Load outside the registry lock so other versions keep serving
+        with load_lock:
+            with self._lock:
+                bundle = self._lookup(version)
+                if bundle is not None:
+                    return bundle
+            bundle = self._load(version)
+            with self._lock:
+                self._bundles[version] = bundle
+                self._evict()
+            return bundle
+
+    def _lookup(self, version):
+        bundle = self._bundles.get(version)
+        if bundle is not None:
+            self._bundles.move_to_end(version)
+        return bundle
+
+    def _evict(self):
+        """Drop least recently used bundles beyond the cache size, never the active one."""
+        while len(self._bundles) > self.cache_size:
+            evict = next((v for v in self._bundles if v != self._active), None)
+            if evict is None:
+                break
+            del self._bundles[evict]
+            logger.info("Evicted model version %s", evict)
+
+    def loaded_versions(self):
+        with self._lock:
+            return list(self._bundles)
+
+    def is_loaded(self, version=None):
+        with self._lock:
+            return (version or self._active) in self._bundles
+
+    def _load(self, version):
+        import joblib
+        from .ml_utils import (
+            DemandLSTM, SklearnScaler, apply_thread_budget, build_inference_model,
+            check_backend_parity, check_scaler_parity, compile_scaler,
+        )
+
+        model_path, scaler_path = self.paths(version)
+        if version != DEFAULT_VERSION and not os.path.isdir(os.path.dirname(model_path)):
+            raise UnknownModelVersion(f"Model version '{version}' not found.")
+
+        # Load scaler
+        scaler = joblib.load(scaler_path)
+        logger.info("Scaler loaded from %s", scaler_path)
+
+        # Serve with the compiled affine scaler only if it agrees with sklearn
+        feature_scaler = compile_scaler(scaler)
+        diff = check_scaler_parity(scaler, feature_scaler)
+        if diff > settings.LSTM_SCALER_PARITY_TOLERANCE:
+            logger.warning(
+                "Compiled scaler failed parity check (max diff %.2e > %.2e); using sklearn",
+                diff, settings.LSTM_SCALER_PARITY_TOLERANCE,
+            )
+            feature_scaler = SklearnScaler(scaler)
+
+        # Load model
+        apply_thread_budget()
+        eager_model = DemandLSTM(
+            input_size=settings.LSTM_INPUT_SIZE,
+            hidden_size=settings.LSTM_HIDDEN_SIZE,
+            num_layers=settings.LSTM_NUM_LAYERS,
+        )
+        state_dict, mapped = _load_state_dict(model_path)
+        if mapped:
+            # Parameters keep pointing at the mapped file pages, shared
+            # between versions and forked workers via the page cache
+            eager_model.load_state_dict(state_dict, assign=True)
+        else:
+            eager_model.load_state_dict(state_dict)
+        eager_model.eval()
+        eager_model.requires_grad_(False)  # inference only; never allocate grads
+        logger.info("LSTM model %s loaded from %s (mmap=%s)", version, model_path, mapped)
+
+        # Swap in the configured backend only if it agrees with eager
+        model, backend_used = eager_model, 'eager'
+        backend = settings.LSTM_INFERENCE_BACKEND
+        if backend != 'eager':
+            candidate = build_inference_model(eager_model, backend)
+            diff = check_backend_parity(eager_model, candidate)
+            if diff <= settings.LSTM_PARITY_TOLERANCE:
+                model, backend_used = candidate, backend
+                logger.info("Using %s inference backend (max diff %.2e)", backend, diff)
+            else:
+                logger.warning(
+                    "%s backend failed parity check (max diff %.2e > %.2e); using eager",
+                    backend, diff, settings.LSTM_PARITY_TOLERANCE,
+                )
+
+        identity = (
+            version,
+            os.stat(model_path).st_mtime_ns,
+            os.stat(scaler_path).st_mtime_ns,
+            backend_used,
+        )
+        return ModelBundle(version, model, eager_model, scaler, feature_scaler, backend_used, identity)
+
+
+model_registry = ModelRegistry(settings.AI_MODEL_REGISTRY_DIR, settings.AI_MODEL_CACHE_SIZE)
@@ -1,5 +1,16 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Prediction
+from .baseline import BASELINE_METHODS
+from .models import ForecastJob, Prediction
+
+# flat:    one prediction repeated for every day ahead
+# rollout: day-by-day autoregressive forecast
+FORECAST_MODES = ('flat', 'rollout')
+
+# lstm:     the model, falling back to a baseline when it can't serve
+# baseline: per-product choice of ewma / croston (see baseline.py)
+FORECAST_ENGINES = ('lstm', 'baseline') + BASELINE_METHODS
 
 
 class PredictionSerializer(serializers.ModelSerializer):
@@ -10,24 +21,145 @@ class PredictionSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'product', 'product_name',
             'predicted_demand', 'prediction_date',
-            'confidence', 'created_at',
+            'confidence', 'lower_bound', 'upper_bound',
+            'model_version', 'engine', 'created_at',
         )
         read_only_fields = fields
 
 
+def _validate_uncertainty(attrs):
+    if attrs.get('uncertainty') and attrs.get('mode') == 'rollout':
+        raise serializers.ValidationError(
+            {'uncertainty': 'Uncertainty intervals are only available in flat mode.'}
+        )
+    if attrs.get('uncertainty') and attrs.get('engine', 'lstm') != 'lstm':
+        raise serializers.ValidationError(
+            {'uncertainty': 'Uncertainty intervals require the lstm engine.'}
+        )
+
+
 class ForecastRequestSerializer(serializers.Serializer):
     """Request body for triggering a forecast."""
 
     product_id = serializers.IntegerField()
     days_ahead = serializers.IntegerField(min_value=1, max_value=30, default=7)
+    model_version = serializers.CharField(required=False, max_length=50)
+    mode = serializers.ChoiceField(choices=FORECAST_MODES, default='flat')
+    engine = serializers.ChoiceField(choices=FORECAST_ENGINES, default='lstm')
+    uncertainty = serializers.BooleanField(default=False)
+    samples = serializers.IntegerField(min_value=2, max_value=1000, required=False)
+
+    def validate(self, attrs):
+        _validate_uncertainty(attrs)
+        return attrs
+
+
+class BatchForecastRequestSerializer(serializers.Serializer):
+    """Request body for forecasting many products in one call."""
+
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False,
+    )
+    all_active = serializers.BooleanField(default=False)
+    days_ahead = serializers.IntegerField(min_value=1, max_value=30, default=7)
+    model_version = serializers.CharField(required=False, max_length=50)
+    mode = serializers.ChoiceField(choices=FORECAST_MODES, default='flat')
+    engine = serializers.ChoiceField(choices=FORECAST_ENGINES, default='lstm')
+    uncertainty = serializers.BooleanField(default=False)
+    samples = serializers.IntegerField(min_value=2, max_value=1000, required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('all_active') and not attrs.get('product_ids'):
+            raise serializers.ValidationError(
+                'Provide a list of product_ids or set all_active to true.'
+            )
+        _validate_uncertainty(attrs)
+        return attrs
+
+
+class ForecastJobSerializer(serializers.ModelSerializer):
+    """Status of a background forecast job (results are added by the detail view)."""
+
+    progress = serializers.FloatField(read_only=True)
+    requested_by = serializers.CharField(source='requested_by.username', read_only=True, default=None)
+
+    class Meta:
+        model = ForecastJob
+        fields = (
+            'id', 'status', 'progress', 'products_done', 'products_total',
+            'params', 'requested_by', 'cancel_requested', 'error', 'timings',
+            'created_at', 'started_at', 'finished_at',
+        )
+        read_only_fields = fields
+
+
+class PromoCalendarSerializer(serializers.Serializer):
+    """A named set of promo days for a what-if scenario."""
+
+    name = serializers.CharField(max_length=50)
+    dates = serializers.ListField(child=serializers.DateField(), default=list)
+
+
+class ScenarioRequestSerializer(serializers.Serializer):
+    """Request body for a price / promo what-if grid."""
+
+    product_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=False,
+    )
+    all_active = serializers.BooleanField(default=False)
+    price_multipliers = serializers.ListField(
+        child=serializers.FloatField(min_value=0.01, max_value=100),
+        min_length=1, max_length=100, default=[1.0],
+    )
+    promo_calendars = PromoCalendarSerializer(many=True, required=False)
+    days_ahead = serializers.IntegerField(min_value=1, max_value=30, default=7)
+    mode = serializers.ChoiceField(choices=FORECAST_MODES, required=False)
+    model_version = serializers.CharField(required=False, max_length=50)
+
+    def validate(self, attrs):
+        if not attrs.get('all_active') and not attrs.get('product_ids'):
+            raise serializers.ValidationError(
+                'Provide a list of product_ids or set all_active to true.'
+            )
+        if not attrs.get('promo_calendars'):
+            attrs['promo_calendars'] = [{'name': 'none', 'dates': []}]
+        if len(attrs['promo_calendars']) > 100:
+            raise serializers.ValidationError(
+                {'promo_calendars': 'At most 100 promo calendars per request.'}
+            )
+
+        # A flat forecast only sees the look-back window, so upcoming promo
+        # days reach the model only through a rollout
+        today = timezone.localdate()
+        upcoming = sorted({d for c in attrs['promo_calendars'] for d in c['dates'] if d > today})
+        if 'mode' not in attrs:
+            attrs['mode'] = 'rollout' if any(c['dates'] for c in attrs['promo_calendars']) else 'flat'
+        elif attrs['mode'] == 'flat' and upcoming:
+            raise serializers.ValidationError({
+                'promo_calendars': f'Promo dates after today (from {upcoming[0]}) need mode "rollout"; '
+                                   f'a flat forecast only sees the last {settings.LSTM_SEQUENCE_LENGTH} days.'
+            })
+        return attrs
+
+
+class ModelActivateSerializer(serializers.Serializer):
+    """Request body for switching the active model version."""
+
+    version = serializers.CharField(max_length=50)
 
 
 class RecommendationSerializer(serializers.Serializer):
-    """Restocking recommendation based on forecast."""
+    """Restocking recommendation from the restock planner (see planner.py)."""
 
     product_id = serializers.IntegerField()
     product_name = serializers.CharField()
     current_stock = serializers.IntegerField()
-    predicted_demand = serializers.FloatField()
+    predicted_demand = serializers.FloatField()  # forecast units per day
+    horizon_days = serializers.IntegerField()
+    lead_time_days = serializers.IntegerField()
+    service_level = serializers.FloatField()
+    safety_stock = serializers.FloatField()
+    reorder_point = serializers.FloatField()
+    days_of_cover = serializers.FloatField(allow_null=True)  # null: no forecast demand
     recommended_restock = serializers.IntegerField()
     urgency = serializers.CharField()  # 'critical', 'warning', 'ok'
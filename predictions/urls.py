@@ -1,8 +1,23 @@
 from django.urls import path
-from .views import ForecastView, PredictionListView, RecommendationView
+from .views import (
+    ForecastView, BatchForecastView, ForecastJobListView, ForecastJobDetailView,
+    ForecastJobCancelView, ScenarioView, ForecastCacheView, ModelHealthView,
+    InferenceMetricsView, ModelVersionsView, ModelActivateView,
+    PredictionListView, RecommendationView,
+)
 
 urlpatterns = [
     path('forecast/', ForecastView.as_view(), name='prediction-forecast'),
+    path('forecast/batch/', BatchForecastView.as_view(), name='prediction-forecast-batch'),
+    path('jobs/', ForecastJobListView.as_view(), name='prediction-jobs'),
+    path('jobs/<int:pk>/', ForecastJobDetailView.as_view(), name='prediction-job-detail'),
+    path('jobs/<int:pk>/cancel/', ForecastJobCancelView.as_view(), name='prediction-job-cancel'),
+    path('scenarios/', ScenarioView.as_view(), name='prediction-scenarios'),
+    path('cache/', ForecastCacheView.as_view(), name='prediction-cache'),
+    path('health/', ModelHealthView.as_view(), name='prediction-health'),
+    path('metrics/', InferenceMetricsView.as_view(), name='prediction-metrics'),
+    path('models/', ModelVersionsView.as_view(), name='prediction-models'),
+    path('models/activate/', ModelActivateView.as_view(), name='prediction-models-activate'),
     path('', PredictionListView.as_view(), name='prediction-list'),
     path('recommendations/', RecommendationView.as_view(), name='prediction-recommendations'),
 ]
@@ -1,27 +1,86 @@
 import math
+import time
 import logging
-from datetime import date, timedelta
+from concurrent import futures
 
-from django.db.models import Sum
-from django.db.models.functions import TruncDate
+import numpy as np
+
+from django.conf import settings
 from rest_framework import status, generics
 from rest_framework.response import Response
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
 from accounts.permissions import IsAdmin
 from products.models import Product
-from transactions.models import Transaction
-from .models import Prediction
-from .serializers import PredictionSerializer, ForecastRequestSerializer, RecommendationSerializer
+from .cache import forecast_cache, state_cache
+from .dispatcher import inference_dispatcher
+from .jobs import forecast_batch, forecast_intervals, job_runner, uncertainty_summary
+from .metrics import latency, span
+from .models import ForecastJob, Prediction
+from .registry import UnknownModelVersion, model_registry
+from .serializers import (
+    PredictionSerializer, ForecastRequestSerializer,
+    BatchForecastRequestSerializer, ScenarioRequestSerializer, ModelActivateSerializer,
+    ForecastJobSerializer, RecommendationSerializer,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _model_unavailable_response():
+    return Response(
+        {
+            'error': 'LSTM model or scaler file not found. '
+                     'Please place inventory_lstm_model.pth and data_scaler.gz '
+                     'in the ml_models/ directory.',
+            'hn': 'Set AI_MODEL_PATH and AI_SCALER_PATH in settings or env vars.',
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+def _unknown_version_response(exc):
+    return Response(
+        {'error': str(exc), 'available': model_registry.available_versions()},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def _requested_products(data, *fields):
+    """
+    Active products picked by a request's ``product_ids`` / ``all_active``,
+    ordered by id and loading only ``fields`` when given.
+
+    Returns
+    -------
+    (list, list, Response | None) — the products, the requested ids that are
+    not active products, and a 404 response when nothing matched
+    """
+    requested_ids = data.get('product_ids') or []
+    products = Product.objects.filter(is_active=True).order_by('id')
+    if not data['all_active']:
+        products = products.filter(id__in=requested_ids)
+    products = list(products.only(*fields) if fields else products)
+    missing = sorted(set(requested_ids) - {p.id for p in products})
+
+    if not products:
+        return products, missing, Response(
+            {'error': 'No matching active products found.', 'missing': missing},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    return products, missing, None
+
+
 class ForecastView(APIView):
     """
     POST /api/predictions/forecast/
-    Triggers LSTM demand forecast for a product.
+    Triggers LSTM demand forecast for a product. mode=rollout forecasts
+    each day ahead autoregressively instead of repeating one prediction;
+    uncertainty=true adds Monte-Carlo dropout intervals (flat mode).
+    engine selects the LSTM (default, with baseline fallback) or a
+    statistical baseline.
     Admin-only.
     """
 
@@ -33,6 +92,12 @@ class ForecastView(APIView):
 
         product_id = serializer.validated_data['product_id']
         days_ahead = serializer.validated_data.get('days_ahead', 7)
+        model_version = serializer.validated_data.get('model_version')
+        mode = serializer.validated_data.get('mode', 'flat')
+        rollout_days = days_ahead if mode == 'rollout' else None
+        engine = serializer.validated_data.get('engine', 'lstm')
+        uncertainty = serializer.validated_data.get('uncertainty', False)
+        samples = serializer.validated_data.get('samples')
 
         try:
             product = Product.objects.get(id=product_id, is_active=True)
@@ -42,66 +107,404 @@ class ForecastView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # ── Fetch last 30 days of sales ──
-        thirty_days_ago = date.today() - timedelta(days=30)
-        daily_sales = (
-            Transaction.objects
-            .filter(product=product, timestamp__date__gte=thirty_days_ago)
-            .annotate(sale_date=TruncDate('timestamp'))
-            .values('sale_date')
-            .annotate(total_qty=Sum('quantity'))
-            .order_by('sale_date')
+        # ── Load the 30-day window and run prediction ──
+        try:
+            from .ml_utils import forecast_uncertainty, forecast_with_engine, get_bundle
+            intervals = None
+            if uncertainty:
+                bundle = get_bundle(model_version)
+                sampled = forecast_uncertainty([product], bundle=bundle, samples=samples)
+                predicted, cached, engines = sampled['predicted'], [False], ['lstm']
+                intervals = forecast_intervals(sampled)
+            else:
+                predicted, cached, engines, bundle = forecast_with_engine(
+                    [product], engine, model_version, rollout_days,
+                )
+            model_version = bundle.version if bundle else ''
+            daily = [int(v) for v in np.broadcast_to(predicted[0], (days_ahead,))]
+            cached = bool(cached[0])
+        except UnknownModelVersion as e:
+            return _unknown_version_response(e)
+        except (FileNotFoundError, futures.TimeoutError):
+            return _model_unavailable_response()
+        except Exception as e:
+            logger.exception("Prediction failed for product %s", product_id)
+            return Response(
+                {'error': f'Prediction failed: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        # ── Store predictions for each day ahead ──
+        with span('persist'):
+            predictions = list(Prediction.objects.store_horizon(
+                [product], [daily], days_ahead, model_version, intervals, engines,
+            ))
+
+        data = {
+            'product': product.name,
+            'predicted_demand_per_day': math.ceil(sum(daily) / days_ahead),
+            'days_ahead': days_ahead,
+            'total_predicted': sum(daily),
+            'mode': mode,
+            'engine': str(engines[0]),
+            'model_version': model_version,
+            'predictions': PredictionSerializer(predictions, many=True).data,
+            'cached': cached,
+            'message': 'Forecast generated successfully.',
+        }
+        if uncertainty:
+            data['uncertainty'] = uncertainty_summary(sampled, 0)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class BatchForecastView(APIView):
+    """
+    POST /api/predictions/forecast/batch/
+    Forecasts many products (or every active product) with one batched
+    LSTM pass instead of one request per product. mode=rollout runs one
+    batched pass per day ahead for the whole set; uncertainty=true runs
+    every product's dropout samples as one enlarged batch.
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def post(self, request):
+        serializer = BatchForecastRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        days_ahead = serializer.validated_data.get('days_ahead', 7)
+        model_version = serializer.validated_data.get('model_version')
+        mode = serializer.validated_data.get('mode', 'flat')
+        engine = serializer.validated_data.get('engine', 'lstm')
+        uncertainty = serializer.validated_data.get('uncertainty', False)
+        samples = serializer.validated_data.get('samples')
+
+        products, missing, error = _requested_products(serializer.validated_data)
+        if error:
+            return error
+
+        # ── Build one (P, 30, 5) batch, run it through the model and store it ──
+        try:
+            results, cached_count, model_version = forecast_batch(
+                products, days_ahead, model_version, mode, engine, uncertainty, samples,
+            )
+        except UnknownModelVersion as e:
+            return _unknown_version_response(e)
+        except (FileNotFoundError, futures.TimeoutError):
+            return _model_unavailable_response()
+        except Exception as e:
+            logger.exception("Batch prediction failed for %d products", len(products))
+            return Response(
+                {'error': f'Prediction failed: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        return Response(
+            {
+                'count': len(results),
+                'cached_count': cached_count,
+                'days_ahead': days_ahead,
+                'mode': mode,
+                'model_version': model_version,
+                'results': results,
+                'missing': missing,
+                'message': 'Batch forecast generated successfully.',
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ForecastJobListView(APIView):
+    """
+    GET  /api/predictions/jobs/   — most recent forecast jobs
+    POST /api/predictions/jobs/   — queue a batch forecast as a background job
+    Takes the batch forecast body and returns 202 with the job at once;
+    poll GET /api/predictions/jobs/<id>/ (optionally ?wait=<seconds>) for
+    progress and results.
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        jobs = ForecastJob.objects.select_related('requested_by')[:50]
+        return Response(ForecastJobSerializer(jobs, many=True).data)
+
+    def post(self, request):
+        serializer = BatchForecastRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+
+        products, missing, error = _requested_products(serializer.validated_data, 'id')
+        if error:
+            return error
+
+        job = job_runner.submit(products, serializer.validated_data, request.user)
+        return Response(
+            {**ForecastJobSerializer(job).data, 'missing': missing, 'message': 'Forecast job queued.'},
+            status=status.HTTP_202_ACCEPTED,
         )
-        daily_sales_list = [
-            {'date': row['sale_date'], 'total_qty': row['total_qty']}
-            for row in daily_sales
-        ]
 
-        # ── Try loading the model and running prediction ──
+
+class ForecastJobDetailView(APIView):
+    """
+    GET /api/predictions/jobs/<id>/?wait=<seconds>
+    Status, progress, timings and (once finished) results of a forecast
+    job. With ?wait, blocks until the job finishes or the wait runs out
+    (at most FORECAST_JOB_MAX_WAIT seconds).
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+    poll_interval = 0.25
+
+    def get(self, request, pk):
         try:
-            from .ml_utils import predict_demand
-            predicted = predict_demand(daily_sales_list, float(product.price))
-        except FileNotFoundError:
+            wait = float(request.query_params.get('wait', 0))
+        except ValueError:
+            wait = math.nan
+        if not math.isfinite(wait):
+            return Response({'error': 'wait must be a number of seconds.'}, status=status.HTTP_400_BAD_REQUEST)
+        wait = min(max(wait, 0), settings.FORECAST_JOB_MAX_WAIT)
+
+        deadline = time.monotonic() + wait
+        while True:
+            job = ForecastJob.objects.select_related('requested_by').filter(pk=pk).first()
+            if job is None:
+                return Response({'error': f'Forecast job {pk} not found.'}, status=status.HTTP_404_NOT_FOUND)
+            if job.is_finished or time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+
+        return Response({**ForecastJobSerializer(job).data, 'result': job.result})
+
+
+class ForecastJobCancelView(APIView):
+    """
+    POST /api/predictions/jobs/<id>/cancel/
+    Cancels a queued job at once, or stops a running one before its next
+    chunk (products already forecast stay stored). 409 if it finished.
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def post(self, request, pk):
+        try:
+            job = ForecastJob.objects.get(pk=pk)
+        except ForecastJob.DoesNotExist:
+            return Response({'error': f'Forecast job {pk} not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not job_runner.cancel(job):
+            return Response(
+                {'error': f'Forecast job {pk} already finished ({job.status}).'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        job.refresh_from_db()
+        return Response(
+            {**ForecastJobSerializer(job).data, 'message': 'Cancellation requested.'},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ScenarioView(APIView):
+    """
+    POST /api/predictions/scenarios/
+    What-if demand surface: forecasts every product under every price
+    multiplier × promo calendar from one sales fetch and one stacked
+    batch. Nothing is stored.
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def post(self, request):
+        serializer = ScenarioRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        multipliers = serializer.validated_data['price_multipliers']
+        calendars = serializer.validated_data['promo_calendars']
+        days_ahead = serializer.validated_data.get('days_ahead', 7)
+        mode = serializer.validated_data.get('mode', 'flat')
+        model_version = serializer.validated_data.get('model_version')
+
+        products, missing, error = _requested_products(serializer.validated_data)
+        if error:
+            return error
+
+        variants = len(products) * len(multipliers) * len(calendars)
+        if variants > settings.SCENARIO_MAX_VARIANTS:
             return Response(
-                {
-                    'error': 'LSTM model or scaler file not found. '
-                             'Please place inventory_lstm_model.pth and data_scaler.gz '
-                             'in the ml_models/ directory.',
-                    'hn': 'Set AI_MODEL_PATH and AI_SCALER_PATH in settings or env vars.',
-                },
-                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                {'error': f'{variants} scenarios requested; the limit is '
+                          f'{settings.SCENARIO_MAX_VARIANTS} (products × prices × calendars).'},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+
+        # ── One sales fetch, one (P·M·C, 30, 5) batch ──
+        try:
+            from .ml_utils import get_bundle, predict_scenarios
+            bundle = get_bundle(model_version)
+            promo_flags = [
+                {d.isoformat(): 1 for d in calendar['dates']} for calendar in calendars
+            ]
+            predicted = predict_scenarios(
+                products, multipliers, promo_flags, bundle=bundle,
+                rollout_days=days_ahead if mode == 'rollout' else None,
+            )
+        except UnknownModelVersion as e:
+            return _unknown_version_response(e)
+        except FileNotFoundError:
+            return _model_unavailable_response()
         except Exception as e:
-            logger.exception("Prediction failed for product %s", product_id)
+            logger.exception("Scenario prediction failed for %d variants", variants)
             return Response(
                 {'error': f'Prediction failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        # ── Store predictions for each day ahead ──
-        predictions = []
-        for i in range(1, days_ahead + 1):
-            pred_date = date.today() + timedelta(days=i)
-            pred, _ = Prediction.objects.update_or_create(
-                product=product,
-                prediction_date=pred_date,
-                defaults={'predicted_demand': predicted},
-            )
-            predictions.append(pred)
+        # (P, M, C) per-day units → totals over the horizon
+        if mode == 'rollout':
+            totals = predicted.sum(axis=-1)
+        else:
+            totals = predicted * days_ahead
+        per_day = np.ceil(totals / days_ahead).astype(np.int64)
+
+        results = []
+        for i, product in enumerate(products):
+            prices = np.round(float(product.price) * np.asarray(multipliers), 2)
+            results.append({
+                'product_id': product.id,
+                'product_name': product.name,
+                'base_price': float(product.price),
+                'prices': prices.tolist(),
+                # Rows follow price_multipliers, columns follow promo_calendars
+                'demand_per_day': per_day[i].tolist(),
+                'total_demand': totals[i].tolist(),
+                'revenue': np.round(totals[i] * prices[:, np.newaxis], 2).tolist(),
+            })
 
         return Response(
             {
-                'product': product.name,
-                'predicted_demand_per_day': predicted,
+                'count': variants,
                 'days_ahead': days_ahead,
-                'total_predicted': predicted * days_ahead,
-                'predictions': PredictionSerializer(predictions, many=True).data,
-                'message': 'Forecast generated successfully.',
+                'mode': mode,
+                'model_version': bundle.version,
+                'price_multipliers': multipliers,
+                'promo_calendars': [calendar['name'] for calendar in calendars],
+                'results': results,
+                'missing': missing,
             },
             status=status.HTTP_200_OK,
         )
 
 
+class ForecastCacheView(APIView):
+    """
+    GET    /api/predictions/cache/ — Forecast cache hit/miss counters.
+    DELETE /api/predictions/cache/ — Clear this worker's forecast cache.
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(forecast_cache.stats())
+
+    def delete(self, request):
+        forecast_cache.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ModelHealthView(APIView):
+    """
+    GET /api/predictions/health/
+    Readiness probe: 200 once this worker has the model loaded and warmed
+    up, 503 while the first forecast would still pay for loading it.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        from .ml_utils import is_ready, get_bundle
+
+        if not is_ready():
+            return Response({'ready': False}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        bundle = get_bundle()
+        return Response({'ready': True, 'version': bundle.version, 'backend': bundle.backend})
+
+
+class InferenceMetricsView(APIView):
+    """
+    GET /api/predictions/metrics/
+    Inference metrics for this worker: rolling p50/p95/p99 latency per
+    forecast pipeline stage, dispatcher queue depth and batch sizes, and
+    forecast cache and incremental LSTM state cache counters. DELETE
+    resets the latency windows.
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response({
+            'stages': latency.summary(),
+            'dispatcher': dict(inference_dispatcher.stats(), enabled=settings.FORECAST_DISPATCH_ENABLED),
+            'cache': forecast_cache.stats(),
+            'state_cache': dict(state_cache.stats(), enabled=settings.LSTM_INCREMENTAL_INFERENCE),
+        })
+
+    def delete(self, request):
+        latency.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ModelVersionsView(APIView):
+    """
+    GET /api/predictions/models/
+    Model versions on disk, the active one and those loaded in this worker.
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response({
+            'active': model_registry.active_version(),
+            'loaded': model_registry.loaded_versions(),
+            'available': model_registry.available_versions(),
+        })
+
+
+class ModelActivateView(APIView):
+    """
+    POST /api/predictions/models/activate/
+    Load a model version and make it active for all workers, without a
+    restart. In-flight forecasts finish on the version they started with.
+    Admin-only.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def post(self, request):
+        serializer = ModelActivateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        version = serializer.validated_data['version']
+
+        try:
+            bundle = model_registry.activate(version)
+        except UnknownModelVersion as e:
+            return _unknown_version_response(e)
+        except FileNotFoundError:
+            return _model_unavailable_response()
+
+        return Response({
+            'message': f'Model version {bundle.version} is now active.',
+            'active': bundle.version,
+            'backend': bundle.backend,
+        })
+
+
 class PredictionListView(generics.ListAPIView):
     """GET /api/predictions/ — Stored predictions with optional filters."""
 
@@ -118,46 +521,31 @@ class PredictionListView(generics.ListAPIView):
 
 class RecommendationView(APIView):
     """
-    GET /api/predictions/recommendations/
-    Restocking recommendations based on latest forecasts.
+    GET /api/predictions/recommendations/?urgency=critical&page=2
+    Restocking plan from the latest forecasts: reorder point, safety stock,
+    days of cover and order quantity per product, planned for the whole
+    catalog in one vectorized pass (see planner.py). Sorted by urgency,
+    then days of cover; paginated.
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        products = Product.objects.filter(is_active=True)
-        recommendations = []
-
-        for product in products:
-            latest_pred = (
-                Prediction.objects
-                .filter(product=product)
-                .order_by('-prediction_date')
-                .first()
-            )
-
-            demand = latest_pred.predicted_demand if latest_pred else 0
-            gap = demand - product.quantity
-
-            if gap > 0:
-                urgency = 'critical' if product.quantity <= product.low_stock_threshold else 'warning'
-                restock = math.ceil(gap * 1.2)  # 20% safety buffer
-            else:
-                urgency = 'ok'
-                restock = 0
+        from .planner import URGENCY_LEVELS, plan_restock, plan_rows
 
-            recommendations.append({
-                'product_id': product.id,
-                'product_name': product.name,
-                'current_stock': product.quantity,
-                'predicted_demand': demand,
-                'recommended_restock': restock,
-                'urgency': urgency,
-            })
+        urgency = request.query_params.get('urgency')
+        if urgency and urgency not in URGENCY_LEVELS:
+            return Response(
+                {'error': f"urgency must be one of: {', '.join(URGENCY_LEVELS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # Sort: critical first, then warning, then ok
-        order = {'critical': 0, 'warning': 1, 'ok': 2}
-        recommendations.sort(key=lambda r: order.get(r['urgency'], 3))
+        plan = plan_restock()
+        order = plan['order']
+        if urgency:
+            order = order[plan['urgency'][order] == urgency]
 
-        serializer = RecommendationSerializer(recommendations, many=True)
-        return Response(serializer.data)
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(order, request, view=self)
+        serializer = RecommendationSerializer(plan_rows(plan, page), many=True)
+        return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:28
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='lead_time_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Supplier lead time in days (default: RESTOCK_LEAD_TIME_DAYS).', null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='service_level',
+            field=models.FloatField(blank=True, help_text='Target probability of not stocking out during lead time (default: RESTOCK_SERVICE_LEVEL).', null=True, validators=[django.core.validators.MinValueValidator(0.5), django.core.validators.MaxValueValidator(0.999)]),
+        ),
+    ]
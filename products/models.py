@@ -1,3 +1,4 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 
@@ -10,6 +11,15 @@ class Product(models.Model):
     quantity = models.PositiveIntegerField(default=0)
     sku = models.CharField(max_length=50, unique=True, blank=True, null=True)
     low_stock_threshold = models.PositiveIntegerField(default=10)
+    lead_time_days = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text='Supplier lead time in days (default: RESTOCK_LEAD_TIME_DAYS).',
+    )
+    service_level = models.FloatField(
+        null=True, blank=True,
+        validators=[MinValueValidator(0.5), MaxValueValidator(0.999)],
+        help_text='Target probability of not stocking out during lead time (default: RESTOCK_SERVICE_LEVEL).',
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
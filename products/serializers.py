@@ -11,7 +11,7 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = (
             'id', 'name', 'description', 'price', 'quantity',
-            'sku', 'low_stock_threshold', 'is_active',
+            'sku', 'low_stock_threshold', 'lead_time_days', 'service_level', 'is_active',
             'is_low_stock', 'created_at', 'updated_at',
         )
         read_only_fields = ('id', 'created_at', 'updated_at', 'is_low_stock')
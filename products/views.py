@@ -1,6 +1,8 @@
+from django.db import transaction
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import IsAdmin
+from dashboard.kpis import invalidate_kpis
 from .models import Product
 from .serializers import ProductSerializer
 
@@ -20,7 +22,16 @@ class ProductViewSet(viewsets.ModelViewSet):
             return [IsAdmin()]
         return [IsAuthenticated()]
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        transaction.on_commit(invalidate_kpis)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        transaction.on_commit(invalidate_kpis)
+
     def perform_destroy(self, instance):
         """Soft-delete by deactivating."""
         instance.is_active = False
         instance.save()
+        transaction.on_commit(invalidate_kpis)
@@ -1,9 +1,23 @@
 from django.contrib import admin
-from .models import Transaction
+from .models import Transaction, DailySales, HourlySales
 
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
     list_display = ('receipt_number', 'product', 'quantity', 'total_price', 'cashier', 'timestamp')
-    list_filter = ('timestamp',)
+    list_filter = ('sale_date',)
     search_fields = ('receipt_number', 'product__name')
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ('date', 'product', 'quantity', 'revenue', 'transaction_count')
+    list_filter = ('date',)
+    search_fields = ('product__name',)
+
+
+@admin.register(HourlySales)
+class HourlySalesAdmin(admin.ModelAdmin):
+    list_display = ('hour', 'product', 'quantity', 'revenue', 'transaction_count')
+    list_filter = ('hour',)
+    search_fields = ('product__name',)
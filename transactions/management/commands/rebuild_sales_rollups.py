@@ -0,0 +1,55 @@
+"""
+Management command to recompute the daily and hourly sales rollups from
+the transactions.
+Usage: python manage.py rebuild_sales_rollups [--days 7 | --since 2026-01-01 [--until 2026-01-31]]
+
+Checkout keeps the rollups current by itself, and migrating backfills
+them from the existing history; run this after any write that bypasses
+checkout, such as a bulk import or a manual timestamp fix. With no
+options every business day is rebuilt. The range is replaced in one
+transaction, so readers never see it half-written.
+"""
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from transactions.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily/hourly sales rollups from the transactions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Rebuild only the last N business days (including today).',
+        )
+        parser.add_argument('--since', help='First business day to rebuild (YYYY-MM-DD).')
+        parser.add_argument('--until', help='Last business day to rebuild (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        try:
+            since = date.fromisoformat(options['since']) if options['since'] else None
+            until = date.fromisoformat(options['until']) if options['until'] else None
+        except ValueError as exc:
+            raise CommandError(f'Invalid date: {exc}')
+        if options['days'] is not None:
+            if since:
+                raise CommandError('Use either --days or --since, not both.')
+            if options['days'] < 1:
+                raise CommandError('--days must be positive.')
+            since = timezone.localdate() - timedelta(days=options['days'] - 1)
+        if since and until and since > until:
+            raise CommandError('--since must not be after --until.')
+
+        span = f'{since or "start"} → {until or "today"}'
+        self.stdout.write(f'Rebuilding sales rollups ({span})...\n')
+        started = time.perf_counter()
+        daily, hourly = rebuild_rollups(since, until)
+        self.stdout.write(f'  ✓ {daily} daily rows')
+        self.stdout.write(f'  ✓ {hourly} hourly rows')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Rebuilt sales rollups in {elapsed:.2f}s'))
@@ -0,0 +1,91 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:32
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+BACKFILL_BATCH = 5000
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build the rollups from the existing transactions (business days/hours in TIME_ZONE)."""
+    Transaction = apps.get_model('transactions', 'Transaction')
+    DailySales = apps.get_model('transactions', 'DailySales')
+    HourlySales = apps.get_model('transactions', 'HourlySales')
+
+    daily = defaultdict(lambda: [0, Decimal('0'), 0])
+    hourly = defaultdict(lambda: [0, Decimal('0'), 0])
+    rows = Transaction.objects.values_list('product_id', 'timestamp', 'quantity', 'total_price')
+    for product_id, timestamp, quantity, total_price in rows.order_by().iterator():
+        local = timezone.localtime(timestamp)
+        hour = local.replace(minute=0, second=0, microsecond=0)
+        for totals in (daily[product_id, local.date()], hourly[product_id, hour]):
+            totals[0] += quantity
+            totals[1] += total_price
+            totals[2] += 1
+
+    DailySales.objects.bulk_create(
+        [
+            DailySales(product_id=product_id, date=day, quantity=quantity, revenue=revenue,
+                       transaction_count=count)
+            for (product_id, day), (quantity, revenue, count) in daily.items()
+        ],
+        batch_size=BACKFILL_BATCH,
+    )
+    HourlySales.objects.bulk_create(
+        [
+            HourlySales(product_id=product_id, hour=hour, quantity=quantity, revenue=revenue,
+                        transaction_count=count)
+            for (product_id, hour), (quantity, revenue, count) in hourly.items()
+        ],
+        batch_size=BACKFILL_BATCH,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_restock_planning'),
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(help_text='Start of the hour in TIME_ZONE.')),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_sales', to='products.product')),
+            ],
+            options={
+                'db_table': 'sales_hourly',
+                'ordering': ['-hour'],
+                'indexes': [models.Index(fields=['hour'], name='sales_hourl_hour_6feae5_idx')],
+                'unique_together': {('product', 'hour')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Business day in TIME_ZONE.')),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product')),
+            ],
+            options={
+                'db_table': 'sales_daily',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='sales_daily_date_bfcf19_idx')],
+                'unique_together': {('product', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
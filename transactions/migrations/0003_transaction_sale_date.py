@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:35
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.utils.timezone
+
+BACKFILL_BATCH = 500
+
+
+def backfill_sale_date(apps, schema_editor):
+    """Set sale_date to each existing transaction's business day in TIME_ZONE."""
+    Transaction = apps.get_model('transactions', 'Transaction')
+    ids_by_day = defaultdict(list)
+    for pk, timestamp in Transaction.objects.values_list('pk', 'timestamp').order_by().iterator():
+        ids_by_day[timezone.localtime(timestamp).date()].append(pk)
+    for day, ids in ids_by_day.items():
+        for start in range(0, len(ids), BACKFILL_BATCH):
+            Transaction.objects.filter(pk__in=ids[start:start + BACKFILL_BATCH]).update(sale_date=day)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='sale_date',
+            field=models.DateField(editable=False, help_text='Business day of timestamp in TIME_ZONE.', null=True),
+        ),
+        migrations.RunPython(backfill_sale_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='transaction',
+            name='sale_date',
+            field=models.DateField(editable=False, help_text='Business day of timestamp in TIME_ZONE.'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['sale_date'], name='transaction_sale_da_736a77_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['product', 'sale_date'], name='transaction_product_981032_idx'),
+        ),
+    ]
@@ -1,9 +1,17 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Transaction(models.Model):
-    """A single line-item in a checkout."""
+    """
+    A single line-item in a checkout.
+
+    ``sale_date`` is the business day of ``timestamp`` in TIME_ZONE, stored
+    (and set by ``save``) so date filters hit an index instead of converting
+    every row's timestamp. Queryset ``update()`` calls that change
+    ``timestamp`` must set it too.
+    """
 
     product = models.ForeignKey(
         'products.Product', on_delete=models.PROTECT, related_name='transactions'
@@ -16,11 +24,65 @@ class Transaction(models.Model):
         null=True, related_name='transactions',
     )
     receipt_number = models.CharField(max_length=30, db_index=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    sale_date = models.DateField(editable=False, help_text='Business day of timestamp in TIME_ZONE.')
 
     class Meta:
         db_table = 'transactions'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['sale_date']),
+            models.Index(fields=['product', 'sale_date']),
+        ]
 
     def __str__(self):
         return f"#{self.receipt_number} | {self.product.name} x{self.quantity}"
+
+    def save(self, *args, **kwargs):
+        self.sale_date = timezone.localtime(self.timestamp).date()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'timestamp' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'sale_date'}
+        super().save(*args, **kwargs)
+
+
+class DailySales(models.Model):
+    """Per-product sales totals for one business day (see transactions/rollups.py)."""
+
+    product = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE, related_name='daily_sales'
+    )
+    date = models.DateField(help_text='Business day in TIME_ZONE.')
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sales_daily'
+        ordering = ['-date']
+        unique_together = ('product', 'date')
+        indexes = [models.Index(fields=['date'])]
+
+    def __str__(self):
+        return f"{self.date} | {self.product.name} x{self.quantity}"
+
+
+class HourlySales(models.Model):
+    """Per-product sales totals for one hour (see transactions/rollups.py)."""
+
+    product = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE, related_name='hourly_sales'
+    )
+    hour = models.DateTimeField(help_text='Start of the hour in TIME_ZONE.')
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sales_hourly'
+        ordering = ['-hour']
+        unique_together = ('product', 'hour')
+        indexes = [models.Index(fields=['hour'])]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} | {self.product.name} x{self.quantity}"
@@ -0,0 +1,126 @@
+"""
+Sales Rollups
+=============
+DailySales and HourlySales hold each product's quantity, revenue and
+transaction count per business day / hour in TIME_ZONE, so dashboards and
+forecast windows read a few rows per product-day instead of scanning every
+Transaction.
+
+``record_sales`` folds new transactions in from inside the writer's own
+atomic block (see CheckoutView), so a rollup never disagrees with a
+committed sale. ``rebuild_rollups`` recomputes a date range from the
+transactions themselves — after a backfill, bulk import or any write that
+bypasses ``record_sales`` (see the rebuild_sales_rollups command).
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import DailySales, HourlySales, Transaction
+
+
+def _increment(model, lookup, quantity, revenue, count):
+    """Add to the rollup row at ``lookup``, creating it if this is its first sale."""
+    changes = {
+        'quantity': F('quantity') + quantity,
+        'revenue': F('revenue') + revenue,
+        'transaction_count': F('transaction_count') + count,
+    }
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                **lookup, quantity=quantity, revenue=revenue, transaction_count=count,
+            )
+    except IntegrityError:
+        # A concurrent checkout created the row first
+        model.objects.filter(**lookup).update(**changes)
+
+
+def record_sales(transactions):
+    """
+    Add ``transactions`` to the daily and hourly rollups.
+
+    Call inside the atomic block that creates them, so the rollups commit
+    or roll back together with the sales.
+    """
+    daily = defaultdict(lambda: [0, Decimal('0'), 0])
+    hourly = defaultdict(lambda: [0, Decimal('0'), 0])
+    for txn in transactions:
+        day = txn.sale_date
+        hour = timezone.localtime(txn.timestamp).replace(minute=0, second=0, microsecond=0)
+        for totals in (daily[txn.product_id, day], hourly[txn.product_id, hour]):
+            totals[0] += txn.quantity
+            totals[1] += txn.total_price
+            totals[2] += 1
+
+    for (product_id, day), totals in daily.items():
+        _increment(DailySales, {'product_id': product_id, 'date': day}, *totals)
+    for (product_id, hour), totals in hourly.items():
+        _increment(HourlySales, {'product_id': product_id, 'hour': hour}, *totals)
+
+
+def _day_start(day):
+    """Aware start of business day ``day``, for index-friendly range filters on hours."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild_rollups(start_date=None, end_date=None):
+    """
+    Recompute the rollups for business days ``start_date`` … ``end_date``
+    (inclusive; open-ended when omitted) from the transactions.
+
+    Returns
+    -------
+    (int, int) — daily and hourly rows written
+    """
+    sales = Transaction.objects.order_by()
+    daily_rows = DailySales.objects.all()
+    hourly_rows = HourlySales.objects.all()
+    if start_date:
+        sales = sales.filter(sale_date__gte=start_date)
+        daily_rows = daily_rows.filter(date__gte=start_date)
+        hourly_rows = hourly_rows.filter(hour__gte=_day_start(start_date))
+    if end_date:
+        sales = sales.filter(sale_date__lte=end_date)
+        daily_rows = daily_rows.filter(date__lte=end_date)
+        hourly_rows = hourly_rows.filter(hour__lt=_day_start(end_date + timedelta(days=1)))
+
+    totals = {
+        'total_quantity': Sum('quantity'),
+        'total_revenue': Sum('total_price'),
+        'total_count': Count('id'),
+    }
+    with transaction.atomic():
+        daily_rows.delete()
+        hourly_rows.delete()
+        daily = DailySales.objects.bulk_create(
+            [
+                DailySales(
+                    product_id=row['product_id'], date=row['bucket'], quantity=row['total_quantity'],
+                    revenue=row['total_revenue'], transaction_count=row['total_count'],
+                )
+                for row in sales.annotate(bucket=F('sale_date'))
+                .values('product_id', 'bucket').annotate(**totals).iterator()
+            ],
+            batch_size=5000,
+        )
+        hourly = HourlySales.objects.bulk_create(
+            [
+                HourlySales(
+                    product_id=row['product_id'], hour=row['bucket'], quantity=row['total_quantity'],
+                    revenue=row['total_revenue'], transaction_count=row['total_count'],
+                )
+                for row in sales.annotate(bucket=TruncHour('timestamp'))
+                .values('product_id', 'bucket').annotate(**totals).iterator()
+            ],
+            batch_size=5000,
+        )
+    return len(daily), len(hourly)
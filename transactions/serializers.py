@@ -11,7 +11,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'product', 'product_name', 'quantity',
             'unit_price', 'total_price', 'cashier', 'cashier_name',
-            'receipt_number', 'timestamp',
+            'receipt_number', 'timestamp', 'sale_date',
         )
         read_only_fields = fields
 
@@ -1,5 +1,6 @@
 import uuid
 from django.db import transaction as db_transaction
+from django.utils import timezone
 from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -7,7 +8,10 @@ from rest_framework.permissions import IsAuthenticated
 
 from products.models import Product
 from inventory.models import InventoryLog
+from predictions.cache import invalidate_products
+from dashboard.kpis import apply_kpi_deltas
 from .models import Transaction
+from .rollups import record_sales
 from .serializers import TransactionSerializer, CheckoutSerializer
 
 
@@ -54,6 +58,7 @@ class CheckoutView(APIView):
 
         # ── Execute checkout atomically ──
         created_transactions = []
+        newly_low_stock = 0
         with db_transaction.atomic():
             for pid, info in product_map.items():
                 product = info['product']
@@ -72,8 +77,10 @@ class CheckoutView(APIView):
                 created_transactions.append(txn)
 
                 # Deduct inventory
+                was_low_stock = product.is_low_stock
                 product.quantity -= qty
                 product.save()
+                newly_low_stock += product.is_low_stock and not was_low_stock
 
                 # Log inventory change
                 InventoryLog.objects.create(
@@ -85,8 +92,22 @@ class CheckoutView(APIView):
                     notes=f'Checkout receipt #{receipt_number}',
                 )
 
+            # Keep the sales rollups in step with the committed transactions
+            record_sales(created_transactions)
+
+            # Cached forecasts for these products are now stale
+            db_transaction.on_commit(lambda: invalidate_products(list(product_map)))
+
+            # Fold the sale into the cached dashboard KPIs once committed
+            grand_total = sum(t.total_price for t in created_transactions)
+            db_transaction.on_commit(lambda: apply_kpi_deltas(
+                transactions=len(created_transactions),
+                revenue=grand_total,
+                low_stock=newly_low_stock,
+                sale_date=timezone.localdate(),
+            ))
+
         # ── Build response ──
-        grand_total = sum(t.total_price for t in created_transactions)
         return Response(
             {
                 'receipt_number': receipt_number,
@@ -116,9 +137,9 @@ class TransactionListView(generics.ListAPIView):
         if receipt:
             qs = qs.filter(receipt_number=receipt)
         if date_from:
-            qs = qs.filter(timestamp__date__gte=date_from)
+            qs = qs.filter(sale_date__gte=date_from)
         if date_to:
-            qs = qs.filter(timestamp__date__lte=date_to)
+            qs = qs.filter(sale_date__lte=date_to)
         return qs
 
 